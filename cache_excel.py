@@ -0,0 +1,102 @@
+# cache_excel.py
+"""
+Cache das planilhas lidas com pd.read_excel (timesheet.xlsx, tabela final
+organizada...). O openpyxl é de longe a parte mais lenta de gerar_plano e do
+excel_organizer, então cada versão do arquivo é lida uma vez e guardada como
+pickle do DataFrame em DIR_CACHE.
+
+Chave = caminho absoluto + mtime + tamanho + argumentos do read_excel: se o
+arquivo mudar, a entrada antiga daquele caminho é apagada e a planilha é
+relida. O diretório é limitado a LIMITE_MB; passando disso saem as entradas
+usadas há mais tempo.
+
+Pickle em vez de Parquet/Feather: não depende de pyarrow e guarda as colunas
+"object" mistas (texto + datetime) exatamente como o read_excel devolveu.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+DIR_CACHE = os.getenv("CACHE_EXCEL_DIR", ".cache_excel")
+LIMITE_MB = int(os.getenv("CACHE_EXCEL_LIMITE_MB", "200"))
+
+
+def _hash(texto):
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def _arquivo_cache(caminho, kwargs, dir_cache):
+    """<hash do caminho>-<hash da versão>.pkl"""
+    estado = caminho.stat()
+    versao = repr((estado.st_mtime_ns, estado.st_size, sorted(kwargs.items())))
+    return Path(dir_cache, f"{_hash(str(caminho))}-{_hash(versao)}.pkl")
+
+
+def ler_excel(caminho, dir_cache=DIR_CACHE, limite_mb=LIMITE_MB, **kwargs):
+    """
+    pd.read_excel(caminho, **kwargs) com cache em disco. Mesmo retorno do
+    read_excel; qualquer problema com o cache cai na leitura normal.
+    """
+    caminho = Path(caminho).resolve()
+    kwargs.setdefault("engine", "openpyxl")
+    destino = _arquivo_cache(caminho, kwargs, dir_cache)
+
+    if destino.exists():
+        try:
+            with open(destino, "rb") as f:
+                df = pickle.load(f)
+            os.utime(destino)  # marca como usado (ordem de remoção)
+            return df
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            destino.unlink(missing_ok=True)
+
+    df = pd.read_excel(caminho, **kwargs)
+    try:
+        _gravar(destino, df)
+        _limitar(dir_cache, limite_mb, manter=destino)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar o cache de {caminho.name}: {e}")
+    return df
+
+
+def _gravar(destino, df):
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    # versões antigas do mesmo arquivo não servem mais
+    prefixo = destino.name.split("-")[0]
+    for antigo in destino.parent.glob(f"{prefixo}-*.pkl"):
+        antigo.unlink(missing_ok=True)
+    # grava num temporário e renomeia: outro processo nunca lê um pickle pela metade
+    fd, tmp = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, destino)
+
+
+def _limitar(dir_cache, limite_mb, manter=None):
+    """Apaga as entradas menos usadas até o diretório caber em limite_mb."""
+    entradas = []
+    for arq in Path(dir_cache).glob("*.pkl"):
+        try:
+            estado = arq.stat()
+        except OSError:
+            continue
+        entradas.append((estado.st_mtime, estado.st_size, arq))
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, arq in sorted(entradas, key=lambda e: e[0]):
+        if total <= limite_mb * 1024 * 1024:
+            break
+        if arq == manter:
+            continue
+        arq.unlink(missing_ok=True)
+        total -= tamanho
+
+
+def limpar_cache(dir_cache=DIR_CACHE):
+    """Remove todas as entradas do cache."""
+    for arq in Path(dir_cache).glob("*.pkl"):
+        arq.unlink(missing_ok=True)
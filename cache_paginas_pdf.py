@@ -0,0 +1,62 @@
+# cache_paginas_pdf.py
+"""
+Cache persistente das tabelas extraídas de cada página do report.pdf.
+
+Chave = hash do content stream da página e dos XObjects que ele desenha +
+tamanho da página + configuração do camelot (ver emailtoexcel.chave_da_pagina).
+O report mensal cresce acrescentando páginas, então numa nova execução só as páginas novas ou
+alteradas passam pelo camelot; o resto sai daqui.
+
+Cada entrada é um pickle com a lista de DataFrames (já organizados) da
+página, inclusive lista vazia para página sem tabela. O diretório é limitado
+a LIMITE_MB; passando disso saem as entradas usadas há mais tempo.
+"""
+
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+DIR_CACHE = os.getenv("CACHE_PDF_DIR", ".cache_pdf")
+LIMITE_MB = int(os.getenv("CACHE_PDF_LIMITE_MB", "200"))
+
+
+def ler(chave, dir_cache=DIR_CACHE):
+    """Tabelas da página guardadas com essa chave, ou None se não houver."""
+    arq = Path(dir_cache, f"{chave}.pkl")
+    if not arq.exists():
+        return None
+    try:
+        with open(arq, "rb") as f:
+            tabelas = pickle.load(f)
+        os.utime(arq)  # marca como usado (ordem de remoção)
+        return tabelas
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        arq.unlink(missing_ok=True)
+        return None
+
+
+def gravar(chave, tabelas, dir_cache=DIR_CACHE):
+    Path(dir_cache).mkdir(parents=True, exist_ok=True)
+    # temporário + rename: uma execução em paralelo nunca lê um pickle pela metade
+    fd, tmp = tempfile.mkstemp(dir=dir_cache, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(tabelas, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, Path(dir_cache, f"{chave}.pkl"))
+
+
+def limitar(dir_cache=DIR_CACHE, limite_mb=LIMITE_MB):
+    """Apaga as entradas menos usadas até o diretório caber em limite_mb."""
+    entradas = []
+    for arq in Path(dir_cache).glob("*.pkl"):
+        try:
+            estado = arq.stat()
+        except OSError:
+            continue
+        entradas.append((estado.st_mtime, estado.st_size, arq))
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, arq in sorted(entradas, key=lambda e: e[0]):
+        if total <= limite_mb * 1024 * 1024:
+            break
+        arq.unlink(missing_ok=True)
+        total -= tamanho
@@ -0,0 +1,150 @@
+# diario_preenchimento.py
+"""
+Diário (journal) append-only do preenchimento, para retomar após queda.
+
+Cada linha do arquivo .jsonl é um evento {"data", "horario", "estado", "plano", "ts"}:
+- "pendente":   vai ser lançado
+- "enviado":    clicou em salvar / POST enviado, ainda sem confirmação
+- "confirmado": modal fechou / endpoint aceitou
+- "incerto":    envio sem resposta conclusiva que não deu para conferir na
+                página (linha ausente); não é relançado, só reverificado
+
+Cada evento é escrito e enviado ao SO na hora (sobrevive a queda do processo);
+o fsync (queda de energia) é feito em lotes de `lote_fsync` eventos e no fechamento.
+Na retomada, confirmados são pulados e só pendente/enviado/incerto são reverificados.
+
+"plano" é o escopo do evento (hash do plano_para_preenchimento.json, ver
+escopo_do_plano): só valem os eventos do plano atual. Um plano regerado
+(ex.: depois de apagar um horário no PMóvel) começa do zero em vez de
+herdar "confirmado" de outro plano. Ao abrir com eventos de outro plano, e
+ao fim de uma execução sem pendências, o arquivo é compactado para uma
+linha por horário do plano atual, então não cresce sem limite.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+ARQ_DIARIO = "preenchimento_diario.jsonl"
+
+PENDENTE = "pendente"
+ENVIADO = "enviado"
+CONFIRMADO = "confirmado"
+INCERTO = "incerto"
+
+
+def escopo_do_plano(caminho):
+    """Hash do conteúdo do arquivo de plano: identifica a que plano um evento pertence."""
+    with open(caminho, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+class DiarioPreenchimento:
+    """
+    escopo: identificador do plano (escopo_do_plano); eventos de outro escopo
+    são ignorados e descartados. None aceita todos os eventos.
+    """
+
+    def __init__(self, caminho=ARQ_DIARIO, lote_fsync=10, escopo=None):
+        self.caminho = caminho
+        self.lote_fsync = lote_fsync
+        self.escopo = escopo
+        self.estados, outros = self._carregar()
+        self._arquivo = None
+        if outros:
+            self.compactar()  # só sobra o plano atual
+        else:
+            self._abrir()
+
+    def _abrir(self):
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._sem_fsync = 0
+        if self._arquivo.tell() > 0 and not self._termina_em_quebra():
+            self._arquivo.write("\n")  # isola a linha truncada da queda anterior
+
+    def _carregar(self):
+        """
+        (último estado de cada (data, horário) do escopo, quantos eventos eram
+        de outro escopo); ignora linha final truncada.
+        """
+        estados, outros = {}, 0
+        if not os.path.exists(self.caminho):
+            return estados, outros
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    evento = json.loads(linha)
+                except ValueError:
+                    continue  # escrita interrompida no meio
+                if self.escopo is not None and evento.get("plano") != self.escopo:
+                    outros += 1
+                    continue
+                estados[(evento["data"], evento["horario"])] = evento["estado"]
+        return estados, outros
+
+    def _evento(self, data_str, horario, estado):
+        return json.dumps({"data": data_str, "horario": horario, "estado": estado, "plano": self.escopo,
+                           "ts": datetime.now().isoformat(timespec="seconds")}, ensure_ascii=False) + "\n"
+
+    def compactar(self):
+        """Reescreve o arquivo com uma linha (o último estado) por horário do escopo atual."""
+        if self._arquivo is not None and not self._arquivo.closed:
+            self._arquivo.close()
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            for (data_str, horario), estado in self.estados.items():
+                f.write(self._evento(data_str, horario, estado))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+        self._abrir()
+
+    def completo(self, itens):
+        """Todos os (data, horário) informados estão confirmados."""
+        return all(self.estados.get(item) == CONFIRMADO for item in itens)
+
+    def _termina_em_quebra(self):
+        with open(self.caminho, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def registrar(self, data_str, horario, estado):
+        self._arquivo.write(self._evento(data_str, horario, estado))
+        self._arquivo.flush()
+        self.estados[(data_str, horario)] = estado
+        self._sem_fsync += 1
+        if self._sem_fsync >= self.lote_fsync:
+            self.sincronizar()
+
+    def sincronizar(self):
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self._sem_fsync = 0
+
+    def fechar(self):
+        if not self._arquivo.closed:
+            self.sincronizar()
+            self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def separar(self, itens):
+        """
+        Divide (data, horário) em: novos (nunca vistos), incertos (pendente,
+        enviado ou incerto numa execução anterior) e quantos já estavam confirmados.
+        """
+        novos, incertos, confirmados = [], [], 0
+        for item in itens:
+            estado = self.estados.get(item)
+            if estado == CONFIRMADO:
+                confirmados += 1
+            elif estado in (PENDENTE, ENVIADO, INCERTO):
+                incertos.append(item)
+            else:
+                novos.append(item)
+        return novos, incertos, confirmados
@@ -1,13 +1,31 @@
 # Instalar dependências (terminal):
-# pip install camelot-py[cv] pandas openpyxl
+# pip install camelot-py[cv] pypdf pandas openpyxl
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import camelot
 import pandas as pd
 import re
+from pypdf import PdfReader
+
+import cache_paginas_pdf
+import triagem_pdf
 
 PDF = "C:\\Relatorios\\report.pdf"
 SAIDA = "tabela_final_organizada.xlsx"
 
+# Extração em paralelo: as páginas são divididas em lotes, um por tarefa
+PROCESSOS = int(os.getenv("PDF_PROCESSOS", os.cpu_count() or 1))
+PAGINAS_POR_LOTE = 8
+
+# Configuração passada ao camelot.read_pdf; entra na chave do cache por página
+CONFIG_CAMELOT = {"flavor": "lattice"}
+VERSAO_CACHE = 1  # mudar quando organizar_colunas mudar (invalida o cache de páginas)
+
 def limpar_texto(valor):
     if pd.isna(valor):
         return None
@@ -57,20 +75,124 @@ def organizar_colunas(df):
     return df
 
 
-def extrair_e_organizar(pdf_path, saida):
+def _hash_xobjects(h, recursos, vistos):
+    """Acrescenta ao hash nome + stream de cada XObject dos /Resources (e dos Forms aninhados)."""
+    recursos = recursos.get_object() if recursos is not None else None
+    xobjects = recursos.get("/XObject") if recursos is not None else None
+    if xobjects is None:
+        return
+    xobjects = xobjects.get_object()
+    for nome in sorted(xobjects):
+        referencia = xobjects[nome]
+        idnum = getattr(referencia, "idnum", None)
+        obj = referencia.get_object()
+        h.update(nome.encode("utf-8"))
+        if idnum is not None:
+            if idnum in vistos:
+                continue  # mesmo objeto já entrou no hash (ou Form que se referencia)
+            vistos.add(idnum)
+        h.update(obj.get_data())
+        if obj.get("/Subtype") == "/Form":
+            _hash_xobjects(h, obj.get("/Resources"), vistos)
+
+
+def chave_da_pagina(pagina, config):
+    """
+    sha1 do content stream + XObjects usados por ele (ex.: "/Fm0 Do") +
+    mediabox + configuração do camelot (+ VERSAO_CACHE).
+    Página igual em outro report dá a mesma chave.
+    """
+    conteudo = pagina.get_contents()
+    h = hashlib.sha1(conteudo.get_data() if conteudo is not None else b"")
+    _hash_xobjects(h, pagina.get("/Resources"), set())
+    h.update(repr([float(v) for v in pagina.mediabox]).encode("utf-8"))
+    h.update(json.dumps([VERSAO_CACHE, config], sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def lotes_de_paginas(paginas, por_lote=PAGINAS_POR_LOTE):
+    """[1, 2, ..., 9] -> ["1,2,...,8", "9"] no formato de pages= do camelot."""
+    return [",".join(str(p) for p in paginas[i:i + por_lote]) for i in range(0, len(paginas), por_lote)]
+
+
+def extrair_lote(pdf_path, paginas, config=CONFIG_CAMELOT):
+    """
+    Extrai e organiza as tabelas das páginas informadas (roda num processo
+    do pool). Retorna [(página, DataFrame)] na ordem do camelot.
+    """
+    tabelas = camelot.read_pdf(pdf_path, pages=paginas, **config)
+    return [(int(t.page), organizar_colunas(t.df)) for t in tabelas]
+
+
+def extrair_tabelas(pdf_path, processos=PROCESSOS, paginas_por_lote=PAGINAS_POR_LOTE, config=CONFIG_CAMELOT,
+                    usar_cache=True, triagem=False):
+    """
+    Tabelas já organizadas, na ordem das páginas.
+    triagem=True: cada página passa antes pelo triagem_pdf, que pula as sem
+    conteúdo tabular e escolhe o flavor (lattice/stream) das demais. Padrão
+    False (todas vão para o camelot com `config`) até a triagem ser conferida
+    em reports reais.
+    Páginas já vistas (mesma chave) vêm do cache_paginas_pdf; as demais são
+    divididas em lotes por flavor e, com processos > 1, extraídas em paralelo
+    (resultados juntados na ordem das páginas, igual ao caminho serial).
+    """
+    reader = PdfReader(pdf_path)
+    total = len(reader.pages)
+    if triagem:
+        decisoes = triagem_pdf.triar_paginas(reader)
+        triagem_pdf.relatar(decisoes)
+        configs = {d["pagina"]: {**config, "flavor": d["decisao"]} for d in decisoes
+                   if d["decisao"] != triagem_pdf.PULAR}
+    else:
+        configs = {p: config for p in range(1, total + 1)}
+    chaves = {p: chave_da_pagina(reader.pages[p - 1], cfg) for p, cfg in configs.items()}
+
+    por_pagina = {}
+    if usar_cache:
+        for pagina, chave in chaves.items():
+            tabelas = cache_paginas_pdf.ler(chave)
+            if tabelas is not None:
+                por_pagina[pagina] = tabelas
+
+    faltando = [p for p in sorted(configs) if p not in por_pagina]
+    print(f"{total} páginas: {total - len(configs)} puladas, {len(por_pagina)} do cache, {len(faltando)} a extrair")
+    if faltando:
+        # um lote só tem páginas do mesmo flavor (uma chamada do camelot = uma configuração)
+        lotes = []
+        for flavor in dict.fromkeys(configs[p]["flavor"] for p in faltando):
+            paginas = [p for p in faltando if configs[p]["flavor"] == flavor]
+            cfg = configs[paginas[0]]
+            lotes += [(lote, cfg) for lote in lotes_de_paginas(paginas, paginas_por_lote)]
+
+        if processos <= 1 or len(lotes) <= 1:
+            resultados = [extrair_lote(pdf_path, lote, cfg) for lote, cfg in lotes]
+        else:
+            print(f"{len(lotes)} lotes, {min(processos, len(lotes))} processos")
+            with ProcessPoolExecutor(max_workers=min(processos, len(lotes))) as executor:
+                resultados = list(executor.map(extrair_lote, [pdf_path] * len(lotes),
+                                               [lote for lote, _ in lotes], [cfg for _, cfg in lotes]))
+
+        novas = {p: [] for p in faltando}  # página sem tabela também entra no cache
+        for pares in resultados:
+            for pagina, df in pares:
+                novas[pagina].append(df)
+        por_pagina.update(novas)
+        if usar_cache:
+            for pagina, tabelas in novas.items():
+                cache_paginas_pdf.gravar(chaves[pagina], tabelas)
+            cache_paginas_pdf.limitar()
+
+    return [df for pagina in sorted(por_pagina) for df in por_pagina[pagina]]
+
+
+def extrair_dataframe(pdf_path, processos=PROCESSOS, triagem=False):
+    """Tabelas do PDF unificadas e limpas, sem gravar nada (None se não houver tabela)."""
     print("Extraindo tabelas...")
-    tabelas = camelot.read_pdf(pdf_path, pages="all")
+    dfs_limpos = extrair_tabelas(pdf_path, processos, triagem=triagem)
 
-    if len(tabelas) == 0:
+    if len(dfs_limpos) == 0:
         print("Nenhuma tabela encontrada.")
-        return
-
-    dfs_limpos = []
-
-    for i, t in enumerate(tabelas):
-        df = t.df
-        df_limpo = organizar_colunas(df)
-        dfs_limpos.append(df_limpo)
+        return None
 
     print("Unificando...")
 
@@ -80,6 +202,13 @@ def extrair_e_organizar(pdf_path, saida):
     # Limpa novamente
     df_final = df_final.map(limpar_texto)
     df_final = df_final.dropna(how="all")
+    return df_final
+
+
+def extrair_e_organizar(pdf_path, saida, processos=PROCESSOS, triagem=False):
+    df_final = extrair_dataframe(pdf_path, processos, triagem)
+    if df_final is None:
+        return
 
     print(f"Salvando em: {saida}")
     df_final.to_excel(saida, index=False)
@@ -87,4 +216,10 @@ def extrair_e_organizar(pdf_path, saida):
     print("Processo concluído, arquivo organizado criado com sucesso!")
 
 
-extrair_e_organizar(PDF, SAIDA)
\ No newline at end of file
+if __name__ == "__main__":
+    # uso: python emailtoexcel.py [report.pdf] [saida.xlsx] [processos]
+    extrair_e_organizar(
+        sys.argv[1] if len(sys.argv) > 1 else PDF,
+        sys.argv[2] if len(sys.argv) > 2 else SAIDA,
+        int(sys.argv[3]) if len(sys.argv) > 3 else PROCESSOS,
+    )
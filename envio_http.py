@@ -0,0 +1,181 @@
+# envio_http.py
+"""
+Backend HTTP do preenchimento: em vez de abrir o modal para cada horário,
+envia os horários direto ao endpoint que o botão "Salvar" do modal chama.
+
+- Reaproveita os cookies autenticados do Selenium numa requests.Session.
+- Conexões keep-alive num pool (HTTPAdapter) e envio em lotes de dias
+  inteiros: os horários de um dia vão em sequência (in_1, out_1, in_2...),
+  só dias diferentes vão em paralelo.
+- Cada envio termina ACEITO, RECUSADO (4xx ou success=false: o servidor não
+  gravou, pode relançar pelo modal) ou INCERTO (queda de conexão, timeout,
+  5xx, resposta ilegível: o servidor pode ter gravado). Incertos são
+  conferidos na página antes de relançar, para não duplicar.
+
+A URL e os nomes dos campos são os do POST feito pelo modal_add_register
+(ver aba Network do navegador) e podem ser trocados pelo .env.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from diario_preenchimento import CONFIRMADO, ENVIADO
+
+URL_BASE = "https://www.pmovel.com.br/"
+URL_ADD_REGISTER = os.getenv("PMOVEL_ADD_REGISTER_URL", urljoin(URL_BASE, "registros/add"))
+CAMPO_DATA = os.getenv("PMOVEL_CAMPO_DATA", "date")
+CAMPO_HORA = os.getenv("PMOVEL_CAMPO_HORA", "time")
+CAMPO_OBS = os.getenv("PMOVEL_CAMPO_OBS", "obs")
+
+TAMANHO_LOTE = 10
+CONEXOES = 4
+TIMEOUT = 15
+
+ACEITO = "aceito"
+RECUSADO = "recusado"
+INCERTO = "incerto"
+
+
+def criar_sessao(cookies, user_agent=None, csrf_token=None, referer=None):
+    """
+    Cria uma sessão HTTP com pool de conexões keep-alive.
+    cookies: lista de dicts no formato de browser.get_cookies()
+    """
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=CONEXOES, max_retries=0)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+
+    for c in cookies:
+        sessao.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+
+    sessao.headers.update({"X-Requested-With": "XMLHttpRequest", "Connection": "keep-alive"})
+    if user_agent:
+        sessao.headers["User-Agent"] = user_agent
+    if csrf_token:
+        sessao.headers["X-CSRF-TOKEN"] = csrf_token
+    if referer:
+        sessao.headers["Referer"] = referer
+    return sessao
+
+
+def criar_sessao_do_navegador(browser):
+    """Sessão HTTP autenticada com os cookies, user agent e token CSRF da aba atual."""
+    user_agent = browser.execute_script("return navigator.userAgent;")
+    csrf_token = browser.execute_script(
+        "const m = document.querySelector(\"meta[name='csrf-token']\"); return m ? m.content : null;"
+    )
+    return criar_sessao(browser.get_cookies(), user_agent, csrf_token, browser.current_url)
+
+
+def enviar_registro(sessao, data_str, horario, obs="Trabalho", url=None):
+    """
+    Envia um horário. Retorna (resultado, motivo), resultado em ACEITO,
+    RECUSADO (4xx ou JSON com success=false) ou INCERTO (sem resposta
+    conclusiva: o horário pode ter sido gravado).
+    """
+    dados = {CAMPO_DATA: data_str, CAMPO_HORA: horario, CAMPO_OBS: obs}
+    try:
+        resp = sessao.post(url or URL_ADD_REGISTER, data=dados, timeout=TIMEOUT, allow_redirects=False)
+    except requests.RequestException as e:
+        return INCERTO, f"erro de conexão: {e}"
+
+    if 400 <= resp.status_code < 500:
+        return RECUSADO, f"HTTP {resp.status_code}"
+    if not 200 <= resp.status_code < 300:
+        return INCERTO, f"HTTP {resp.status_code}"
+
+    if "json" in resp.headers.get("Content-Type", ""):
+        try:
+            corpo = resp.json()
+        except ValueError:
+            return INCERTO, "JSON inválido"
+        if isinstance(corpo, dict) and corpo.get("success") is False:
+            return RECUSADO, corpo.get("message") or "recusado"
+    return ACEITO, "ok"
+
+
+def _enviar_dia(sessao, itens, obs, url):
+    """
+    Horários de um mesmo dia, em ordem e um de cada vez. Depois do primeiro
+    que não for aceito os seguintes não são enviados (voltam como RECUSADO),
+    para o dia não ficar com saída antes da entrada.
+    """
+    resultados = []
+    for data_str, horario in itens:
+        if resultados and resultados[-1][0] != ACEITO:
+            resultados.append((RECUSADO, "não enviado: horário anterior do dia não foi aceito"))
+        else:
+            resultados.append(enviar_registro(sessao, data_str, horario, obs, url))
+    return resultados
+
+
+def agrupar_por_dia(itens):
+    """{data: [(data, horário), ...]} mantendo a ordem de chegada."""
+    por_dia = {}
+    for data_str, horario in itens:
+        por_dia.setdefault(data_str, []).append((data_str, horario))
+    return por_dia
+
+
+def enviar_lote(sessao, itens, obs="Trabalho", url=None):
+    """
+    Envia um lote de (data, horário): cada dia em sequência, dias diferentes
+    em paralelo nas conexões do pool. Retorna [(item, resultado, motivo)] na
+    ordem de `itens`.
+    """
+    dias = list(agrupar_por_dia(itens).values())
+    with ThreadPoolExecutor(max_workers=CONEXOES) as executor:
+        por_dia = executor.map(lambda dia: _enviar_dia(sessao, dia, obs, url), dias)
+        resultados = {item: r for dia, res in zip(dias, por_dia) for item, r in zip(dia, res)}
+    return [(item, *resultados[item]) for item in itens]
+
+
+def lotes_de_dias(itens, tamanho=TAMANHO_LOTE):
+    """Lotes de até `tamanho` horários sem partir um dia entre dois lotes."""
+    lotes, atual = [], []
+    for dia in agrupar_por_dia(itens).values():
+        if atual and len(atual) + len(dia) > tamanho:
+            lotes.append(atual)
+            atual = []
+        atual += dia
+    if atual:
+        lotes.append(atual)
+    return lotes
+
+
+def enviar_pendentes_http(browser, pendentes, obs="Trabalho", url=None, sessao=None, diario=None):
+    """
+    Envia todos os horários pendentes em lotes de até TAMANHO_LOTE (dias inteiros).
+    Retorna (recusados, incertos), listas de (data, horário): recusados podem
+    ser relançados pelo modal; incertos precisam ser conferidos na página
+    antes (ver preencher_registros.conferir_incertos).
+    diario: DiarioPreenchimento opcional; cada lote é marcado como enviado
+    antes do POST e os aceitos como confirmados (incertos ficam "enviado").
+    """
+    if sessao is None:
+        sessao = criar_sessao_do_navegador(browser)
+
+    recusados, incertos = [], []
+    with sessao:
+        for lote in lotes_de_dias(pendentes):
+            if diario:
+                for data_str, horario in lote:
+                    diario.registrar(data_str, horario, ENVIADO)
+            for (data_str, horario), resultado, motivo in enviar_lote(sessao, lote, obs, url):
+                if resultado == ACEITO:
+                    if diario:
+                        diario.registrar(data_str, horario, CONFIRMADO)
+                    print(f"⚠️ Horario Salvo (HTTP) para {data_str}, horário {horario}")
+                elif resultado == RECUSADO:
+                    print(f"❌ Endpoint recusou {data_str} / horário {horario}: {motivo}")
+                    recusados.append((data_str, horario))
+                else:
+                    print(f"❓ Sem confirmação para {data_str} / horário {horario}: {motivo}")
+                    incertos.append((data_str, horario))
+
+    return recusados, incertos
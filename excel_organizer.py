@@ -1,11 +1,22 @@
 # emailtoexcel_improved.py
 # Requer: pip install pandas openpyxl
 # Uso: python emailtoexcel_improved.py
+#      python emailtoexcel_improved.py --comparar [planilha.xlsx]   (motor vetorizado x iterativo)
+#      python emailtoexcel_improved.py --streaming [entrada.xlsx|.csv] [saida.xlsx|.csv]   (exportações grandes)
 
+import csv
+import numpy as np
 import pandas as pd
 import re
+import sys
+import time
+from functools import lru_cache
 from pathlib import Path
 
+from openpyxl import Workbook, load_workbook
+
+from cache_excel import ler_excel
+
 # --- Ajuste só estes caminhos ---
 INPUT = "C:\\Users\\brludas\\Downloads\\script pmg\\script_horas\\tabela_final_organizada.xlsx"
 OUTPUT = "timesheet.xlsx"
@@ -34,18 +45,117 @@ cliente_re = re.compile(
     r"^(?:[A-Z]{2,10}|[A-ZÁÉÍÓÚÂÊÔÃÕ][\w\-\.' ]{2,})$"
 )
 
+# Linhas de cabeçalho (puladas inteiras)
+cabecalho_re = re.compile("data de início|hora de início|duration|data de início da planilha")
 
-def processar_arquivo(input_path, output_path):
-    print("Lendo:", input_path)
-    df = pd.read_excel(input_path, engine="openpyxl")
+TAMANHO_CACHE_CELULAS = 65536  # textos distintos guardados por classificar_celula
 
-    # Normaliza texto em todas as células
-    df_clean = df.fillna("").astype(str).applymap(limpar_texto)
+COLUNAS_SAIDA = ["Data","Hora início","Hora fim","Duração","Tipo","Cliente","OT","Descrição","raw","orig_row"]
+CHAVE_DUPLICADOS = ["Data", "Hora início", "OT", "Tipo"]  # registros repetidos
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_CELULAS)
+def classificar_celula(cell_text, com_duracao, com_tipo, com_ot, com_cliente):
+    """
+    Aplica a cascata de regexes a uma célula. Os com_* dizem o que a linha
+    já achou nas células anteriores (aí aquele campo não é pego de novo nem
+    removido do texto). Função pura e memoizada: nas exportações os mesmos
+    textos (clientes, tipos, OTs) se repetem milhares de vezes.
+    Retorna (data, horas, duracao, tipo, ot, cliente, sobra); os campos não
+    achados nesta célula vêm None e sobra é o texto que vai para a descrição.
+    """
+    data = duracao = tipo = ot = cliente = None
+    horas = ()
+    cell_text = str(cell_text).strip()
+
+    # datetime (dd/mm/yyyy HH:MM)
+    dtm = datetime_re.search(cell_text)
+    if dtm:
+        data = dtm.group(1)
+        horas = (dtm.group(2),)
+        cell_text = datetime_re.sub("", cell_text).strip()
+
+    # date
+    d = date_re.search(cell_text)
+    if d:
+        data = d.group(1)
+        cell_text = date_re.sub("", cell_text).strip()
+
+    # times
+    times = time_re.findall(cell_text)
+    if times:
+        horas += tuple(times)
+        cell_text = time_re.sub("", cell_text).strip()
+
+    # duração
+    dur = duration_re.findall(cell_text)
+    if dur and not com_duracao:
+        # escolhe primeiro que pareça duração
+        for dm in dur:
+            # evita pegar coisas estranhas
+            cand = dm.replace(",", ".")
+            try:
+                duracao = float(cand)
+                # remove apenas a primeira ocorrência
+                cell_text = duration_re.sub("", cell_text, count=1).strip()
+                break
+            except ValueError:
+                continue
+
+    # tipo
+    tp = types_re.search(cell_text)
+    if tp and not com_tipo:
+        tipo = tp.group(1).capitalize()
+        cell_text = types_re.sub("", cell_text).strip()
+
+    # OT
+    otm = ot_re.search(cell_text)
+    if otm and not com_ot:
+        ot = otm.group(1)
+        cell_text = ot_re.sub("", cell_text).strip()
+
+    # Detecta cliente automaticamente:
+    if not com_cliente:
+        # candidato = texto curto, começa com maiúscula, não tem hora/data, não é tipo
+        if (
+            2 <= len(cell_text.split()) <= 5 and
+            not date_re.search(cell_text) and
+            not datetime_re.search(cell_text) and
+            not time_re.search(cell_text) and
+            not duration_re.search(cell_text) and
+            not types_re.search(cell_text.lower()) and
+            not ot_re.search(cell_text) and
+            cliente_re.match(cell_text)
+        ):
+            cliente = cell_text
+            cell_text = ""
+
+    return data, horas, duracao, tipo, ot, cliente, cell_text
+
+
+def estatisticas_cache_celulas():
+    """Acertos/faltas do cache de classificar_celula (functools.CacheInfo)."""
+    return classificar_celula.cache_info()
 
-    registros = []
+
+def _imprimir_cache_celulas():
+    info = estatisticas_cache_celulas()
+    total = info.hits + info.misses
+    if total:
+        print(f"🧠 Cache de células: {info.hits}/{total} acertos ({info.hits / total:.0%}), "
+              f"{info.currsize}/{info.maxsize} textos guardados")
+
+
+def classificar_linhas(linhas):
+    """
+    Motor original, linha a linha e célula a célula, aplicando os regexes em
+    sequência. linhas: iterável de (idx, células normalizadas); gera um
+    registro (dict) por linha significativa. A data corrente vive no gerador,
+    então segue de um pedaço da planilha para o próximo.
+    """
     current_date = None
 
-    for idx, row in df_clean.iterrows():
+    for idx, row in linhas:
         joined = " | ".join([c for c in row if c])
         if not joined:
             continue
@@ -65,76 +175,24 @@ def processar_arquivo(input_path, output_path):
         for cell in row:
             if not cell:
                 continue
-            cell_text = str(cell).strip()
-            cell_low = cell_text.lower()
-
-            # datetime (dd/mm/yyyy HH:MM)
-            dtm = datetime_re.search(cell_text)
-            if dtm:
-                current_date = dtm.group(1)
-                horas.append(dtm.group(2))
-                cell_text = datetime_re.sub("", cell_text).strip()
-
-            # date
-            d = date_re.search(cell_text)
-            if d:
-                current_date = d.group(1)
-                cell_text = date_re.sub("", cell_text).strip()
-
-            # times
-            times = time_re.findall(cell_text)
-            if times:
-                for t in times:
-                    horas.append(t)
-                cell_text = time_re.sub("", cell_text).strip()
-
-            # duração
-            dur = duration_re.findall(cell_text)
-            if dur and rec["Duração"] is None:
-                # escolhe primeiro que pareça duração
-                for dm in dur:
-                    # evita pegar coisas estranhas
-                    cand = dm.replace(",", ".")
-                    try:
-                        v = float(cand)
-                        rec["Duração"] = v
-                        # remove apenas a primeira ocorrência
-                        cell_text = duration_re.sub("", cell_text, count=1).strip()
-                        break
-                    except:
-                        continue
-
-            # tipo
-            tp = types_re.search(cell_text)
-            if tp and not rec["Tipo"]:
-                rec["Tipo"] = tp.group(1).capitalize()
-                cell_text = types_re.sub("", cell_text).strip()
-
-            # OT
-            otm = ot_re.search(cell_text)
-            if otm and not rec["OT"]:
-                rec["OT"] = otm.group(1)
-                cell_text = ot_re.sub("", cell_text).strip()
-
-            # Detecta cliente automaticamente:
-            if not rec["Cliente"]:
-                # candidato = texto curto, começa com maiúscula, não tem hora/data, não é tipo
-                if (
-                    2 <= len(cell_text.split()) <= 5 and
-                    not date_re.search(cell_text) and
-                    not datetime_re.search(cell_text) and
-                    not time_re.search(cell_text) and
-                    not duration_re.search(cell_text) and
-                    not types_re.search(cell_text.lower()) and
-                    not ot_re.search(cell_text) and
-                    cliente_re.match(cell_text)
-                ):
-                    rec["Cliente"] = cell_text
-                    cell_text = ""
+            data, horas_celula, duracao, tipo, ot, cliente, sobra = classificar_celula(
+                cell, rec["Duração"] is not None, bool(rec["Tipo"]), bool(rec["OT"]), bool(rec["Cliente"])
+            )
+            if data:
+                current_date = data
+            horas.extend(horas_celula)
+            if duracao is not None:
+                rec["Duração"] = duracao
+            if tipo:
+                rec["Tipo"] = tipo
+            if ot:
+                rec["OT"] = ot
+            if cliente:
+                rec["Cliente"] = cliente
 
             # leftover -> parte da descrição
-            if cell_text:
-                descr.append(cell_text)
+            if sobra:
+                descr.append(sobra)
 
         # carry-forward de data
         if current_date:
@@ -154,20 +212,301 @@ def processar_arquivo(input_path, output_path):
         # Se não encontrou nada significativo, pule (evita lixos)
         meaningful = any([rec[k] for k in ["Data","Hora início","Hora fim","Duração","Tipo","OT","Cliente","Descrição"]])
         if meaningful:
-            registros.append(rec)
+            yield rec
+
+
+def classificar_iterativo(df_clean):
+    """
+    Motor linha a linha sobre a planilha inteira (padrão de processar_arquivo).
+    df_clean: planilha já normalizada (strings, "" nas vazias).
+    """
+    linhas = zip(df_clean.index, df_clean.itertuples(index=False, name=None))
+    return pd.DataFrame(list(classificar_linhas(linhas)), columns=COLUNAS_SAIDA)
+
+
+def normalizar_celulas(df):
+    """Mesmo que df.fillna("").astype(str).map(limpar_texto), coluna a coluna."""
+    df_clean = df.fillna("").astype(str)
+    for col in df_clean.columns:
+        df_clean[col] = df_clean[col].str.replace(r"\s+", " ", regex=True).str.strip()
+    return df_clean
+
+
+def _primeira_da_linha(achou, linha):
+    """True só na primeira célula de cada linha em que `achou` é True."""
+    return achou & (achou.groupby(linha).cumsum() == 1)
+
+
+def _extrair(texto, padrao, contem=None):
+    """
+    texto.str.extract(padrao), mas rodando o regex uma vez por texto distinto
+    e só nas células não vazias (e que tenham o trecho `contem`, quando o
+    padrão exige um). Planilhas de timesheet repetem muito o mesmo texto.
+    """
+    alvo = texto != ""
+    if contem:
+        alvo &= texto.str.contains(contem, regex=False)
+    grupos = pd.DataFrame(np.nan, index=texto.index, columns=range(padrao.groups), dtype=object)
+    if alvo.any():
+        codigos, distintos = pd.factorize(texto[alvo])
+        achados = pd.Series(distintos).str.extract(padrao)
+        grupos[alvo] = achados.to_numpy()[codigos]
+    return grupos
+
+
+def _juntar_por_linha(celulas, n_linhas, n_colunas):
+    """
+    " | ".join das células não vazias de cada linha. celulas é indexada pela
+    posição na planilha achatada (linha * n_colunas + coluna).
+    """
+    grade = np.full(n_linhas * n_colunas, "", dtype=object)
+    grade[celulas.index.to_numpy()] = celulas.to_numpy()
+    return pd.Series([" | ".join([c for c in r if c]) for r in grade.reshape(n_linhas, n_colunas)])
+
+
+def classificar_vetorizado(df_clean):
+    """
+    Mesmo resultado de classificar_iterativo, com as células empilhadas numa
+    Series só e cada etapa (data/hora, duração, tipo, OT, cliente) aplicada de
+    uma vez com str.extract/str.contains. As etapas continuam em sequência
+    porque cada uma vê o texto que sobrou da anterior, e duração/tipo/OT/
+    cliente só valem na primeira célula da linha que os tiver.
+    """
+    n_linhas, n_colunas = df_clean.shape
+    celulas = pd.Series(df_clean.to_numpy(dtype=object).ravel())
+    linha = pd.Series(np.repeat(np.arange(n_linhas), n_colunas))
+    nao_vazias = celulas != ""
+    celulas, linha = celulas[nao_vazias], linha[nao_vazias]
+
+    # linhas vazias e de cabeçalho não contam nem para a data corrente
+    joined = _juntar_por_linha(celulas, n_linhas, n_colunas)
+    joined = joined[joined != ""]
+    cabecalho = joined.str.lower().str.contains(cabecalho_re)
+    validas = joined.index[~cabecalho]
+    manter = linha.isin(validas)
+    texto, linha = celulas[manter], linha[manter]
+    if texto.empty:
+        return pd.DataFrame(columns=COLUNAS_SAIDA)
 
-    # Cria DataFrame final
-    df_final = pd.DataFrame(registros, columns=["Data","Hora início","Hora fim","Duração","Tipo","Cliente","OT","Descrição","raw","orig_row"])
+    # datetime, data e horas (sem depender do que a linha já achou)
+    dtm = _extrair(texto, datetime_re, "/")
+    tem = dtm[0].notna()
+    texto[tem] = texto[tem].str.replace(datetime_re, "", regex=True).str.strip()
+    data = _extrair(texto, date_re, "/")[0]
+    tem = data.notna()
+    texto[tem] = texto[tem].str.replace(date_re, "", regex=True).str.strip()
+    data_celula = data.fillna(dtm[0])
+
+    horas = texto.str.findall(time_re)
+    tem = horas.str.len() > 0
+    texto[tem] = texto[tem].str.replace(time_re, "", regex=True).str.strip()
+    horas = dtm[1].map(lambda h: [h] if isinstance(h, str) else []) + horas
+    horas = horas.explode().dropna()
+    ordem = horas.groupby(linha[horas.index]).cumcount()
+    hora_inicio = pd.Series(horas[ordem == 0].to_numpy(), index=linha[horas.index[ordem == 0]])
+    hora_fim = pd.Series(horas[ordem == 1].to_numpy(), index=linha[horas.index[ordem == 1]])
+
+    # duração: só a 1ª ocorrência, da 1ª célula da linha que tiver
+    dur = _extrair(texto, duration_re)[0]
+    prim = _primeira_da_linha(dur.notna(), linha)
+    duracao = pd.Series(dur[prim].str.replace(",", ".").astype(float).to_numpy(), index=linha[prim])
+    texto[prim] = texto[prim].str.replace(duration_re, "", n=1, regex=True).str.strip()
+
+    tp = _extrair(texto, types_re)[0]
+    prim = _primeira_da_linha(tp.notna(), linha)
+    tipo = pd.Series(tp[prim].str.capitalize().to_numpy(), index=linha[prim])
+    texto[prim] = texto[prim].str.replace(types_re, "", regex=True).str.strip()
+
+    otm = _extrair(texto, ot_re)[0]
+    prim = _primeira_da_linha(otm.notna(), linha)
+    ot = pd.Series(otm[prim].to_numpy(), index=linha[prim])
+    texto[prim] = texto[prim].str.replace(ot_re, "", regex=True).str.strip()
+
+    # cliente: filtra em cascata, cada teste só nas células que passaram no anterior
+    candidato = texto.str.split().str.len().between(2, 5).to_numpy()
+    for teste in (lambda t: ~t.str.contains(date_re), lambda t: ~t.str.contains(datetime_re),
+                  lambda t: ~t.str.contains(time_re), lambda t: ~t.str.contains(duration_re),
+                  lambda t: ~t.str.lower().str.contains(types_re), lambda t: ~t.str.contains(ot_re),
+                  lambda t: t.str.match(cliente_re)):
+        candidato[candidato] = teste(texto[candidato]).to_numpy(dtype=bool)
+    candidato = pd.Series(candidato, index=texto.index)
+    prim = _primeira_da_linha(candidato, linha)
+    cliente = pd.Series(texto[prim].to_numpy(), index=linha[prim])
+    texto[prim] = ""
+
+    descricao = _juntar_por_linha(texto, n_linhas, n_colunas).str.strip()
+    descricao = descricao[descricao != ""]
+
+    # carry-forward de data: última data vista em cada linha, propagada para as seguintes
+    data_linha = data_celula.dropna().groupby(linha[data_celula.notna()]).last()
+    campos = {
+        "Data": data_linha.reindex(validas).ffill(),
+        "Hora início": hora_inicio.reindex(validas),
+        "Hora fim": hora_fim.reindex(validas),
+        "Duração": duracao.reindex(validas),
+        "Tipo": tipo.reindex(validas),
+        "Cliente": cliente.reindex(validas),
+        "OT": ot.reindex(validas),
+        "Descrição": descricao.reindex(validas),
+    }
+    # mesma regra do "meaningful": algum campo verdadeiro (duração 0.0 não conta)
+    significativa = np.zeros(len(validas), dtype=bool)
+    for nome, serie in campos.items():
+        vazio = 0.0 if nome == "Duração" else ""
+        significativa |= (serie.notna() & (serie != vazio)).to_numpy()
+    if not significativa.any():
+        return pd.DataFrame(columns=COLUNAS_SAIDA)
+
+    saida = {nome: serie[significativa].astype(object).where(serie[significativa].notna(), None).tolist()
+             for nome, serie in campos.items()}
+    saida["raw"] = joined[validas][significativa].tolist()
+    saida["orig_row"] = df_clean.index[validas[significativa]].tolist()
+    return pd.DataFrame(saida, columns=COLUNAS_SAIDA)
+
+
+# --- Modo streaming (memória limitada) ---
+
+
+def _celula_texto(valor):
+    """Mesma normalização de normalizar_celulas, para um valor vindo do openpyxl/csv."""
+    if valor is None:
+        return ""
+    return limpar_texto(str(valor))
+
+
+def ler_linhas_streaming(input_path):
+    """
+    Gera (idx, células normalizadas) sem carregar a planilha inteira:
+    .xlsx pelo openpyxl em modo read_only, .csv pelo módulo csv.
+    A primeira linha é o cabeçalho (como no pd.read_excel) e é pulada;
+    idx conta as linhas de dados a partir de 0, como o índice do DataFrame.
+    """
+    if Path(input_path).suffix.lower() == ".csv":
+        with open(input_path, "r", encoding="utf-8-sig", newline="") as f:
+            leitor = csv.reader(f)
+            next(leitor, None)
+            for idx, valores in enumerate(leitor):
+                yield idx, [_celula_texto(v) for v in valores]
+        return
+
+    wb = load_workbook(input_path, read_only=True, data_only=True)
+    try:
+        linhas = wb.active.iter_rows(values_only=True)
+        next(linhas, None)
+        for idx, valores in enumerate(linhas):
+            yield idx, [_celula_texto(v) for v in valores]
+    finally:
+        wb.close()
+
+
+def sem_duplicados(registros):
+    """Mesmo critério do drop_duplicates(keep="first"), com um conjunto de chaves já vistas."""
+    vistos = set()
+    for rec in registros:
+        chave = tuple(rec[c] for c in CHAVE_DUPLICADOS)
+        if chave in vistos:
+            continue
+        vistos.add(chave)
+        yield rec
+
+
+def gravar_streaming(registros, output_path):
+    """Grava os registros conforme chegam (.xlsx em write_only ou .csv). Retorna quantos."""
+    total = 0
+    if Path(output_path).suffix.lower() == ".csv":
+        with open(output_path, "w", encoding="utf-8-sig", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(COLUNAS_SAIDA)
+            for rec in registros:
+                escritor.writerow(["" if rec[c] is None else rec[c] for c in COLUNAS_SAIDA])
+                total += 1
+        return total
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(COLUNAS_SAIDA)
+    for rec in registros:
+        ws.append([rec[c] for c in COLUNAS_SAIDA])
+        total += 1
+    wb.save(output_path)
+    return total
+
+
+def processar_arquivo_streaming(input_path, output_path):
+    """
+    Mesmo processamento de processar_arquivo, com memória praticamente
+    constante: linhas lidas uma a uma, registros gravados conforme saem e
+    duplicados descartados na hora. Retorna o número de registros gravados
+    (não monta DataFrame).
+    """
+    print("Lendo (streaming):", input_path)
+    registros = sem_duplicados(classificar_linhas(ler_linhas_streaming(input_path)))
+    total = gravar_streaming(registros, output_path)
+    print(f"Salvo em: {output_path} ({total} registros)")
+    _imprimir_cache_celulas()
+    return total
+
+
+def comparar_motores(input_path):
+    """
+    Roda os dois motores na mesma planilha, confere se batem e mede o tempo.
+    O iterativo começa com o cache de células vazio, como numa execução nova.
+    """
+    df = ler_excel(input_path)
+    classificar_celula.cache_clear()
+    inicio = time.perf_counter()
+    referencia = classificar_iterativo(df.fillna("").astype(str).map(limpar_texto))
+    t_iterativo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    vetorizado = classificar_vetorizado(normalizar_celulas(df))
+    t_vetorizado = time.perf_counter() - inicio
+
+    iguais = referencia.equals(vetorizado)
+    print(f"{'✅' if iguais else '❌'} {len(referencia)} registros; iterativo {t_iterativo:.2f}s, "
+          f"vetorizado {t_vetorizado:.2f}s (x{t_iterativo / max(t_vetorizado, 1e-9):.1f})")
+    return iguais, t_iterativo, t_vetorizado
+
+
+def organizar_timesheet(df, motor="iterativo"):
+    """
+    Planilha crua (tabela_final_organizada) -> timesheet, em memória.
+    Mesmo resultado de processar_arquivo sem ler nem gravar arquivo.
+    """
+    # Normaliza texto em todas as células
+    df_clean = normalizar_celulas(df)
+    classificar = classificar_iterativo if motor == "iterativo" else classificar_vetorizado
+    df_final = classificar(df_clean)
 
     # Remove duplicados óbvios (mesma data, hora e OT)
-    df_final = df_final.drop_duplicates(subset=["Data","Hora início","OT","Tipo"], keep="first").reset_index(drop=True)
+    return df_final.drop_duplicates(subset=CHAVE_DUPLICADOS, keep="first").reset_index(drop=True)
+
+
+def processar_arquivo(input_path, output_path, motor="iterativo"):
+    """
+    motor: "iterativo" (padrão) ou "vetorizado". Percorrendo tuplas em vez de
+    iterrows e com o cache de células, o iterativo ficou mais rápido que o
+    vetorizado; este fica para conferência (comparar_motores). Para
+    exportações grandes, ver processar_arquivo_streaming.
+    """
+    print("Lendo:", input_path)
+    df = ler_excel(input_path)
+    df_final = organizar_timesheet(df, motor)
 
     # Salva
     df_final.to_excel(output_path, index=False, engine="openpyxl")
     print("Salvo em:", output_path)
+    if motor == "iterativo":
+        _imprimir_cache_celulas()
     return df_final
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--comparar":
+        comparar_motores(sys.argv[2] if len(sys.argv) > 2 else INPUT)
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == "--streaming":
+        processar_arquivo_streaming(sys.argv[2] if len(sys.argv) > 2 else INPUT,
+                                    sys.argv[3] if len(sys.argv) > 3 else OUTPUT)
+        sys.exit()
     df_out = processar_arquivo(INPUT, OUTPUT)
     print("Exemplo (top 10):")
     print(df_out.head(10))
@@ -1,86 +1,68 @@
-import win32com.client
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 import tempfile, os
 
-# --- Função para pegar o HTML do email ---
-def get_latest_email_html(subject_filter):
-    outlook = win32com.client.Dispatch("Outlook.Application").GetNamespace("MAPI")
-    inbox = outlook.GetDefaultFolder(6)  # Caixa de entrada
-
-    messages = inbox.Items
-    valid_messages = []
-
-    for m in messages:
-        try:
-            _ = m.ReceivedTime
-            valid_messages.append(m)
-        except Exception:
-            continue
-
-    if not valid_messages:
-        return None
-
-    valid_messages = sorted(valid_messages, key=lambda x: x.ReceivedTime, reverse=True)
-
-    for mail in valid_messages:
-        try:
-            if subject_filter.lower() in mail.Subject.lower():
-                return mail.HTMLBody
-        except Exception:
-            continue
+from pool_navegadores import pool_padrao
+import fonte_email
+import tabela_email
 
-    return None
-
-# --- Função para extrair a tabela renderizada com Selenium ---
-def extract_salesforce_table(html):
+# --- Função para pegar o HTML do email ---
+def get_latest_email_html(subject_filter, fonte=None):
+    """
+    HTML do email mais recente cujo assunto contém subject_filter.
+    fonte: FonteOutlook/FonteLocal (fonte_email); padrão: fonte_padrao(),
+    que usa as exportações locais indexadas se EMAIL_ORIGEM estiver definida.
+    """
+    fonte = fonte or fonte_email.fonte_padrao()
+    return fonte.ultimo_html(subject_filter)
+
+# --- Função para extrair a tabela do email ---
+def extract_salesforce_table(html, motor="lxml", colunas=None):
+    """
+    motor="lxml": lê o HTML direto (tabela_email), sem Chrome; colunas escolhe
+    a tabela pelo cabeçalho. motor="selenium": renderiza no Chrome headless.
+    """
+    if motor == "selenium":
+        return _extract_salesforce_table_selenium(html)
+    return tabela_email.primeira_tabela(html, colunas)
+
+# --- Extração renderizada com Selenium (caminho antigo) ---
+def _extract_salesforce_table_selenium(html):
     tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix=".html")
     tmpfile.write(html.encode('utf-8'))
     tmpfile.close()
 
-    chrome_opts = Options()
-    chrome_opts.add_argument("--headless")
-    chrome_opts.add_argument("--disable-gpu")
-    chrome_opts.add_argument("--window-size=1920,1080")
-    driver = webdriver.Chrome(options=chrome_opts)
-    driver.get("file:///" + tmpfile.name)
-
-    # O Salesforce geralmente usa classes para tabelas, mas podemos pegar a primeira table visível
-    tables = driver.find_elements("tag name", "table")
     data = []
-
-    for table in tables:
-        try:
-            rows = table.find_elements("tag name", "tr")
-            for r in rows:
-                cells = r.find_elements("xpath", ".//th|.//td")
-                row_data = [c.text.strip() for c in cells if c.text.strip() != ""]
-                if row_data:
-                    data.append(row_data)
-            if data:
-                break  # Pega só a primeira tabela válida
-        except Exception:
-            continue
-
-    driver.quit()
-    os.unlink(tmpfile.name)
+    try:
+        # Chrome headless reaproveitado do pool (evita abrir um por email)
+        with pool_padrao().navegador("headless") as driver:
+            driver.get("file:///" + tmpfile.name)
+
+            # O Salesforce geralmente usa classes para tabelas, mas podemos pegar a primeira table visível
+            tables = driver.find_elements("tag name", "table")
+
+            for table in tables:
+                try:
+                    rows = table.find_elements("tag name", "tr")
+                    for r in rows:
+                        cells = r.find_elements("xpath", ".//th|.//td")
+                        row_data = [c.text.strip() for c in cells if c.text.strip() != ""]
+                        if row_data:
+                            data.append(row_data)
+                    if data:
+                        break  # Pega só a primeira tabela válida
+                except Exception:
+                    continue
+    finally:
+        os.unlink(tmpfile.name)
     return data
 
 # --- Função para gerar Excel só com as colunas que importam ---
-def generate_excel(subject="Relatar resultados (Tabela de Horas Trabalhadas)"):
-    html = get_latest_email_html(subject)
+def generate_excel(subject="Relatar resultados (Tabela de Horas Trabalhadas)", fonte=None):
+    html = get_latest_email_html(subject, fonte)
     if not html:
         print("❌ Nenhum email encontrado.")
         return
 
-    table_data = extract_salesforce_table(html)
-    if not table_data:
-        print("❌ Nenhuma tabela parseável encontrada.")
-        return
-
-    # --- Filtrando apenas as colunas que queremos ---
-    headers = table_data[0]
     wanted_columns = [
         "Hora de início↓",
         "Hora de término",
@@ -88,6 +70,14 @@ def generate_excel(subject="Relatar resultados (Tabela de Horas Trabalhadas)"):
         "Service Appointment: Account Name | Site Name"
     ]
 
+    table_data = extract_salesforce_table(html, colunas=wanted_columns)
+    if not table_data:
+        print("❌ Nenhuma tabela parseável encontrada.")
+        return
+
+    # --- Filtrando apenas as colunas que queremos ---
+    headers = table_data[0]
+
     col_indexes = [headers.index(c) for c in wanted_columns if c in headers]
     if not col_indexes:
         print("❌ As colunas desejadas não foram encontradas.")
@@ -0,0 +1,289 @@
+# fonte_email.py
+"""
+De onde vem o email do relatório do Salesforce.
+
+- FonteOutlook: caixa de entrada do Outlook (COM). Ordena os itens pelo
+  próprio Outlook (Items.Sort) e para no primeiro assunto que bate, em vez de
+  tocar o ReceivedTime de cada item e ordenar tudo no Python.
+- FonteLocal: exportações em disco (.eml soltos, pasta Maildir ou arquivo
+  mbox). Mantém um índice SQLite (message-id, assunto, recebimento, arquivo +
+  offset) em ARQ_INDICE; "último email com esse assunto" vira uma consulta
+  pelo índice de recebimento, e só arquivos novos/alterados são relidos a
+  cada atualização (mbox que cresceu é lido a partir de onde parou).
+
+EMAIL_ORIGEM (caminho) escolhe a FonteLocal em fonte_padrao(); sem ela, Outlook.
+
+Uso:
+    python fonte_email.py <pasta|arquivo.mbox|arquivo.eml> ["assunto"]
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from email import policy
+from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser, BytesParser
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+ARQ_INDICE = os.getenv("EMAIL_INDICE", ".indice_emails.sqlite")
+BYTES_ASSINATURA = 4096  # início do mbox que identifica "o mesmo arquivo"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    caminho TEXT PRIMARY KEY,
+    origem TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    assinatura TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mensagens (
+    id INTEGER PRIMARY KEY,
+    origem TEXT NOT NULL,
+    caminho TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    tamanho INTEGER NOT NULL,
+    message_id TEXT,
+    assunto TEXT,
+    assunto_min TEXT,
+    recebido REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mensagens_recebido ON mensagens (origem, recebido);
+CREATE INDEX IF NOT EXISTS idx_mensagens_caminho ON mensagens (caminho);
+"""
+
+# compat32 só para indexar: devolve os cabeçalhos crus, bem mais rápido que o
+# policy.default (que monta objetos para cada um); o assunto é decodificado à parte
+_cabecalhos = BytesHeaderParser(policy=policy.compat32)
+_mensagens = BytesParser(policy=policy.default)
+
+
+def _data_recebimento(cabecalho, padrao):
+    """Data do Received mais recente (o do servidor que entregou), senão Date, senão `padrao`."""
+    candidatos = [r.rsplit(";", 1)[-1] for r in (cabecalho.get_all("received") or []) if ";" in r]
+    if cabecalho.get("date"):
+        candidatos.append(str(cabecalho["date"]))
+    for valor in candidatos:
+        try:
+            data = parsedate_to_datetime(valor.strip())
+        except (TypeError, ValueError, IndexError):
+            continue
+        if data.tzinfo is None:
+            data = data.astimezone()  # sem fuso: hora local, como o Outlook mostraria
+        return data.timestamp()
+    return padrao
+
+
+def _registro(bruto, padrao):
+    """(message_id, assunto, recebido) a partir dos cabeçalhos de uma mensagem."""
+    fim = bruto.find(b"\n\n")
+    fim_crlf = bruto.find(b"\r\n\r\n")
+    if fim_crlf != -1 and (fim == -1 or fim_crlf < fim):
+        fim = fim_crlf
+    cabecalho = _cabecalhos.parsebytes(bruto if fim == -1 else bruto[:fim + 2])
+    try:
+        assunto = " ".join(str(make_header(decode_header(str(cabecalho.get("subject") or "")))).split())
+    except (ValueError, LookupError, UnicodeError):
+        assunto = ""  # cabeçalho mal codificado: fica sem assunto, mas indexado
+    return str(cabecalho.get("message-id") or "").strip() or None, assunto, _data_recebimento(cabecalho, padrao)
+
+
+def _assinatura(caminho, tamanho=BYTES_ASSINATURA):
+    """
+    sha1 dos primeiros min(BYTES_ASSINATURA, tamanho) bytes. Para comparar com
+    a assinatura guardada, passe o tamanho que o arquivo tinha quando ela foi
+    calculada: um mbox menor que BYTES_ASSINATURA que só cresceu continua batendo.
+    """
+    with open(caminho, "rb") as f:
+        return hashlib.sha1(f.read(min(BYTES_ASSINATURA, tamanho))).hexdigest()
+
+
+def _mensagens_mbox(caminho, inicio=0):
+    """
+    (offset, tamanho) de cada mensagem do mbox a partir de `inicio`. Uma
+    mensagem começa numa linha "From " no início do arquivo ou após linha em
+    branco; offset/tamanho já excluem essa linha separadora.
+    """
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        posicao = inicio
+        atual = None
+        anterior_vazia = True
+        for linha in f:
+            if linha.startswith(b"From ") and anterior_vazia:
+                if atual is not None:
+                    yield atual, posicao - atual
+                atual = posicao + len(linha)
+            anterior_vazia = linha in (b"\n", b"\r\n")
+            posicao += len(linha)
+        if atual is not None:
+            yield atual, posicao - atual
+
+
+class FonteOutlook:
+    """Caixa de entrada do Outlook via COM (só Windows)."""
+
+    def __init__(self, pasta=6):  # 6 = olFolderInbox
+        self.pasta = pasta
+
+    def ultimo_html(self, filtro_assunto):
+        import win32com.client  # só aqui: a FonteLocal não precisa do pywin32
+
+        outlook = win32com.client.Dispatch("Outlook.Application").GetNamespace("MAPI")
+        itens = outlook.GetDefaultFolder(self.pasta).Items
+        itens.Sort("[ReceivedTime]", True)  # mais recente primeiro, ordenado pelo Outlook
+
+        filtro = filtro_assunto.lower()
+        for mail in itens:
+            try:
+                if filtro in mail.Subject.lower():
+                    return mail.HTMLBody
+            except Exception:
+                continue  # convites, relatórios de entrega etc. sem Subject/HTMLBody
+        return None
+
+
+class FonteLocal:
+    """
+    Emails exportados em disco, indexados em SQLite.
+    origem: pasta (Maildir com cur/ e new/, ou qualquer pasta com .eml),
+    arquivo .eml ou arquivo mbox.
+    """
+
+    def __init__(self, origem, arq_indice=ARQ_INDICE):
+        self.origem = str(Path(origem).resolve())
+        self.arq_indice = arq_indice
+        self._con = None
+
+    def conexao(self):
+        if self._con is None:
+            self._con = sqlite3.connect(self.arq_indice)
+            self._con.executescript(ESQUEMA)
+        return self._con
+
+    def fechar(self):
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    def _arquivos(self):
+        """(caminho, é_mbox) de tudo que a origem contém hoje."""
+        raiz = Path(self.origem)
+        if raiz.is_file():
+            return [(str(raiz), raiz.suffix.lower() != ".eml")]
+        if (raiz / "cur").is_dir() or (raiz / "new").is_dir():
+            return [(str(a), False) for sub in ("new", "cur") if (raiz / sub).is_dir()
+                    for a in (raiz / sub).iterdir() if a.is_file() and not a.name.startswith(".")]
+        return [(str(a), False) for a in raiz.rglob("*.eml") if a.is_file()]
+
+    def atualizar(self):
+        """Indexa o que entrou/mudou desde a última vez. Retorna quantas mensagens foram (re)indexadas."""
+        con = self.conexao()
+        conhecidos = {c: (t, m, a) for c, t, m, a in con.execute(
+            "SELECT caminho, tamanho, mtime, assinatura FROM arquivos WHERE origem = ?", (self.origem,))}
+        atuais = self._arquivos()
+        novas = 0
+        with con:
+            for caminho in set(conhecidos) - {c for c, _ in atuais}:
+                con.execute("DELETE FROM mensagens WHERE caminho = ?", (caminho,))
+                con.execute("DELETE FROM arquivos WHERE caminho = ?", (caminho,))
+
+            for caminho, mbox in atuais:
+                estado = os.stat(caminho)
+                anterior = conhecidos.get(caminho)
+                if anterior and anterior[0] == estado.st_size and anterior[1] == estado.st_mtime:
+                    continue  # não mudou
+
+                assinatura = _assinatura(caminho) if mbox else ""
+                inicio = 0
+                if (mbox and anterior and estado.st_size > anterior[0]
+                        and anterior[2] == _assinatura(caminho, anterior[0])):
+                    inicio = anterior[0]  # mbox só cresceu: lê a partir de onde parou
+                else:
+                    con.execute("DELETE FROM mensagens WHERE caminho = ?", (caminho,))
+
+                if mbox:
+                    linhas = []
+                    with open(caminho, "rb") as f:
+                        for offset, tamanho in _mensagens_mbox(caminho, inicio):
+                            f.seek(offset)
+                            linhas.append((offset, tamanho, f.read(tamanho)))
+                else:
+                    with open(caminho, "rb") as f:
+                        bruto = f.read()
+                    linhas = [(0, len(bruto), bruto)]
+
+                for offset, tamanho, bruto in linhas:
+                    message_id, assunto, recebido = _registro(bruto, estado.st_mtime)
+                    con.execute(
+                        "INSERT INTO mensagens (origem, caminho, offset, tamanho, message_id, assunto, assunto_min,"
+                        " recebido) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (self.origem, caminho, offset, tamanho, message_id, assunto, assunto.casefold(), recebido))
+                novas += len(linhas)
+                con.execute("INSERT OR REPLACE INTO arquivos (caminho, origem, tamanho, mtime, assinatura)"
+                            " VALUES (?, ?, ?, ?, ?)", (caminho, self.origem, estado.st_size, estado.st_mtime, assinatura))
+        return novas
+
+    def buscar(self, assunto=None, desde=None, ate=None, limite=None):
+        """
+        Mensagens da origem, mais recentes primeiro: dicts com message_id,
+        assunto, recebido (datetime), caminho, offset e tamanho.
+        assunto: trecho do assunto (sem diferenciar maiúsculas); desde/ate: datetime.
+        """
+        sql = "SELECT message_id, assunto, recebido, caminho, offset, tamanho FROM mensagens WHERE origem = ?"
+        parametros = [self.origem]
+        if assunto:
+            sql += " AND instr(assunto_min, ?) > 0"
+            parametros.append(assunto.casefold())
+        if desde is not None:
+            sql += " AND recebido >= ?"
+            parametros.append(desde.timestamp())
+        if ate is not None:
+            sql += " AND recebido <= ?"
+            parametros.append(ate.timestamp())
+        sql += " ORDER BY recebido DESC"
+        if limite:
+            sql += " LIMIT ?"
+            parametros.append(limite)
+        return [{"message_id": m, "assunto": a, "recebido": datetime.fromtimestamp(r), "caminho": c,
+                 "offset": o, "tamanho": t}
+                for m, a, r, c, o, t in self.conexao().execute(sql, parametros)]
+
+    def ler_mensagem(self, item):
+        """EmailMessage completo de um resultado de buscar()."""
+        with open(item["caminho"], "rb") as f:
+            f.seek(item["offset"])
+            return _mensagens.parsebytes(f.read(item["tamanho"]))
+
+    def ultimo_html(self, filtro_assunto):
+        """Corpo HTML do email mais recente cujo assunto contém filtro_assunto (None se não houver)."""
+        self.atualizar()
+        for item in self.buscar(filtro_assunto, limite=1):
+            corpo = self.ler_mensagem(item).get_body(preferencelist=("html",))
+            return corpo.get_content() if corpo is not None else None
+        return None
+
+
+def fonte_padrao():
+    """FonteLocal se EMAIL_ORIGEM estiver definida, senão FonteOutlook."""
+    origem = os.getenv("EMAIL_ORIGEM")
+    return FonteLocal(origem) if origem else FonteOutlook()
+
+
+if __name__ == "__main__":
+    fonte = FonteLocal(sys.argv[1] if len(sys.argv) > 1 else os.getenv("EMAIL_ORIGEM", "."))
+    inicio = time.perf_counter()
+    novas = fonte.atualizar()
+    print(f"📬 Índice atualizado: {novas} mensagens indexadas em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    if len(sys.argv) > 2:
+        inicio = time.perf_counter()
+        achados = fonte.buscar(sys.argv[2], limite=1)
+        ms = (time.perf_counter() - inicio) * 1000
+        if achados:
+            print(f"✅ {achados[0]['recebido']:%d/%m/%Y %H:%M} {achados[0]['assunto']} ({ms:.2f} ms)")
+        else:
+            print(f"❌ Nenhum email com '{sys.argv[2]}' ({ms:.2f} ms)")
+    fonte.fechar()
@@ -10,15 +10,21 @@ Regras principais (resumo):
 - Dias sem SF e vazios -> horário padrão 07:30-16:54.
 """
 
+import hashlib
 import json
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
 import pandas as pd
 from pathlib import Path
-from copy import deepcopy
+
+import intervalos as iv
+from cache_excel import ler_excel
 
 # ----------------- CONFIG -----------------
 ARQ_REGISTROS = "registros_mensais.json"
 ARQ_PLANO = "plano_para_preenchimento.json"
+ARQ_PLANO_CACHE = "plano_cache.json"
+ARQ_DIAS_RECALCULADOS = "plano_dias_recalculados.json"
 ARQ_SF = r"C:\Users\brludas\Downloads\script pmg\script_horas\timesheet.xlsx"
 
 HORA_MIN_INICIO = datetime.strptime("06:30", "%H:%M")
@@ -34,6 +40,63 @@ LIMITE_DIA = 10
 MAX_DAY_TIME = datetime.strptime("23:59", "%H:%M")
 PMOVEL_BLOCK_TRIM_TIME = datetime.strptime("07:30", "%H:%M").time()  # arrivals ending >= this need -1min when sent to B
 
+# mesmos horários em minutos inteiros, usados pelo alocador (ver intervalos.py)
+HORA_MIN_INICIO_MIN = iv.minutos(HORA_MIN_INICIO)
+HORA_PADRAO_IN_MIN = iv.minutos(HORA_PADRAO_IN)
+HORA_PADRAO_OUT_MIN = iv.minutos(HORA_PADRAO_OUT)
+MAX_DAY_MIN = iv.minutos(MAX_DAY_TIME)
+PMOVEL_BLOCK_TRIM_MIN = PMOVEL_BLOCK_TRIM_TIME.hour * 60 + PMOVEL_BLOCK_TRIM_TIME.minute
+
+MAX_PROCESSOS = 4  # planejar_lote
+VERSAO_PLANO = 1  # mudar quando as regras do alocador mudarem (invalida plano_cache.json)
+COLUNAS_SF = ["Data", "Hora início", "Hora fim", "Tipo"]
+
+
+def _limiar_minutos(condicao, de=-2 * 1440, ate=4 * 1440):
+    """Menor m inteiro em [de, ate] com condicao(m) (condicao crescente em m; busca binária)."""
+    while de < ate:
+        meio = (de + ate) // 2
+        if condicao(meio):
+            ate = meio
+        else:
+            de = meio + 1
+    return de
+
+
+class Politica:
+    """
+    Regras de jornada usadas pelo plano. Os padrões são as constantes acima;
+    uma conta/mês com regra diferente recebe a sua própria Politica.
+    Horários em "HH:MM", durações em horas.
+    """
+
+    def __init__(self, minimo_liquido=MINIMO_LIQUIDO, pausa=1.0, limite_dia=LIMITE_DIA,
+                 hora_min_inicio="06:30", hora_padrao_in=HORA_PADRAO_IN_STR, hora_padrao_out=HORA_PADRAO_OUT_STR):
+        self.minimo_liquido = minimo_liquido
+        self.bruto_necessario = minimo_liquido + pausa
+        self.limite_dia = limite_dia
+        self.hora_padrao_in_str = hora_padrao_in
+        self.hora_padrao_out_str = hora_padrao_out
+        self.hora_min_inicio = iv.minutos(hora_min_inicio)
+        self.hora_padrao_in = iv.minutos(hora_padrao_in)
+        self.hora_padrao_out = iv.minutos(hora_padrao_out)
+        # os mesmos limites em minutos inteiros, para o alocador comparar sem float
+        self.bruto_minutos = _limiar_minutos(lambda m: m / 60 >= self.bruto_necessario)
+        self.limite_minutos = _limiar_minutos(lambda m: m / 60 > self.limite_dia)
+        self.minimo_liquido_txt = f"{minimo_liquido:.2f}"
+
+    def chave(self):
+        """Valores que afetam o plano (entram no fingerprint de cada dia)."""
+        return [self.minimo_liquido, self.bruto_necessario, self.limite_dia, self.hora_min_inicio,
+                self.hora_padrao_in_str, self.hora_padrao_out_str, MAX_DAY_MIN, PMOVEL_BLOCK_TRIM_MIN]
+
+    def __repr__(self):
+        return (f"Politica(minimo_liquido={self.minimo_liquido:.2f}h, bruto={self.bruto_necessario:.2f}h, "
+                f"limite_dia={self.limite_dia}h, padrao={self.hora_padrao_in_str}-{self.hora_padrao_out_str})")
+
+
+POLITICA_PADRAO = Politica()
+
 # ------------- HELPERS -------------
 def parse_hora(h):
     if pd.isna(h) or str(h).strip() == "":
@@ -42,18 +105,56 @@ def parse_hora(h):
         return datetime.strptime(h.strftime("%H:%M"), "%H:%M")
     return datetime.strptime(str(h).strip(), "%H:%M")
 
-def duracao_horas(blocos):
-    total = 0.0
-    for a, b in blocos:
-        total += (b - a).total_seconds() / 3600
-    return total
+def parse_horas_coluna(serie):
+    """
+    Versão vetorizada de parse_hora para uma coluna inteira.
+    Vazio/NaN -> NaT; Timestamp/datetime -> só HH:MM; texto -> "%H:%M"
+    (texto fora do formato levanta ValueError, como parse_hora).
+    """
+    texto = serie.astype(str).str.strip()
+    vazio = serie.isna() | (texto == "")
+    eh_data = serie.map(lambda v: isinstance(v, datetime)) & ~vazio
+    if eh_data.any():
+        texto.loc[eh_data] = pd.to_datetime(serie[eh_data]).dt.strftime("%H:%M")
+    return pd.to_datetime(texto.where(~vazio), format="%H:%M")
+
+def agrupar_atendimentos_sf(df):
+    """
+    Timesheet (colunas Data, Hora início, Hora fim, Tipo) ->
+    {"dd/mm/aaaa": {"labor": [(h1,h2), ...], "arrival": [...], "departure": [...]}}
+    com h1/h2 em minutos inteiros desde 00:00.
+    Linhas sem data ou sem as duas horas são descartadas; a ordem das linhas
+    é mantida dentro de cada dia/tipo.
+    """
+    df = df[df["Data"].notna()]
+    if df.empty:
+        return {}
+
+    h1 = parse_horas_coluna(df["Hora início"])
+    h2 = parse_horas_coluna(df["Hora fim"])
+    validos = h1.notna() & h2.notna()
+
+    blocos = pd.DataFrame({
+        "dia": df["Data"].dt.strftime("%d/%m/%Y"),
+        "tipo": df["Tipo"].astype(str).str.strip().str.lower().replace("labour", "labor"),
+    })[validos]
+    base = pd.Timestamp(1900, 1, 1)
+    inicios = ((h1[validos] - base) // pd.Timedelta(minutes=1)).tolist()
+    fins = ((h2[validos] - base) // pd.Timedelta(minutes=1)).tolist()
 
-def cap_saida_no_dia(saida_dt):
-    if not isinstance(saida_dt, datetime):
-        return saida_dt
-    if saida_dt.time() > MAX_DAY_TIME.time():
-        return datetime.combine(saida_dt.date(), MAX_DAY_TIME.time())
-    return saida_dt
+    atendimentos_sf = {}
+    for (dia, tipo), posicoes in blocos.groupby(["dia", "tipo"], sort=False).indices.items():
+        atendimentos_sf.setdefault(dia, {})[tipo] = [(inicios[i], fins[i]) for i in posicoes]
+    return atendimentos_sf
+
+def cap_saida_no_dia(saida):
+    """
+    Limita a saída a 23:59 do próprio dia. Em minutos inteiros a hora do dia
+    nunca passa de 23:59 (só segundos o fariam), então só vale como guarda.
+    """
+    if iv.hora_do_dia(saida) > MAX_DAY_MIN:
+        return saida - iv.hora_do_dia(saida) + MAX_DAY_MIN
+    return saida
 
 def subtrair_intervalo(original, usado):
     """
@@ -61,77 +162,92 @@ def subtrair_intervalo(original, usado):
     usado: (u1,u2) guaranteed subset of original
     retorna lista de intervalos leftovers (0,1 ou 2)
     """
-    o1, o2 = original
-    u1, u2 = usado
-    restos = []
-    if u1 > o1:
-        restos.append((o1, min(u1, o2)))
-    if u2 < o2:
-        restos.append((max(u2, o1), o2))
-    return restos
+    return iv.subtrair([original], [usado])
 
 def ajustar_arrival_para_pmovel(h1, h2):
     """Se fim >= 07:30, aplica -1 minuto em ambos os lados; caso contrário retorna inalterado."""
-    if h2.time() >= PMOVEL_BLOCK_TRIM_TIME:
-        return (h1 - timedelta(minutes=1), h2 - timedelta(minutes=1))
+    if iv.hora_do_dia(h2) >= PMOVEL_BLOCK_TRIM_MIN:
+        return (h1 - 1, h2 - 1)
     return (h1, h2)
 
+def _horas_em_minutos(horas):
+    """Horas (float) -> minutos inteiros, como timedelta(hours=...) arredondaria."""
+    return round(horas * 60)
+
+def _inicio(intervalo):
+    return intervalo[0]
+
+
+# f"{m / 60:.2f}" de cada minuto inteiro de até 3 dias: formatar float custava
+# quase tanto quanto a alocação inteira. Horas que vêm de minutos inteiros
+# nunca caem num empate de arredondamento (5m/3 nunca termina em ,5), então
+# a soma em float (com erro ~1e-15) e m / 60 dão o mesmo texto.
+_HORAS_TXT = [f"{m / 60:.2f}" for m in range(3 * iv.MINUTOS_DIA)]
+
+
+def _horas_txt(horas):
+    """f"{horas:.2f}" para horas que são minutos inteiros / 60."""
+    m = round(horas * 60)
+    if 0 <= m < len(_HORAS_TXT):
+        return _HORAS_TXT[m]
+    return f"{horas:.2f}"
+
+
 # ------------- ALLOCADOR DE SUPLEMENTO -------------
-def alocar_complementos(labors, arrivals, departures):
+def alocar_complementos(labors, arrivals, departures, politica=POLITICA_PADRAO):
     """
     Decide quais partes de arrivals/departures serão USADAS para compor o bloco de trabalho.
+    Todos os horários são minutos inteiros (ver intervalos.py).
     Retorna:
-      - entrada (datetime), saida (datetime), status, descricao,
+      - entrada (min), saida (min), status, descricao (str),
       - used_arrivals (list of (h1,h2)),
       - used_departures (list of (h1,h2)),
       - leftover_arrivals (list of (h1,h2)),
       - leftover_departures (list of (h1,h2))
     """
-    # deep copies para manipular leftovers
-    leftover_arr = deepcopy(arrivals)
-    leftover_dep = deepcopy(departures)
+    minimo_liquido = politica.minimo_liquido
+    bruto_necessario = politica.bruto_necessario
+    limite_dia = politica.limite_dia
+    hora_min_inicio = politica.hora_min_inicio
+    bruto_minutos = politica.bruto_minutos
 
-    total_labor = duracao_horas(labors)
+    total_labor = iv.duracao_horas(labors)
 
     # Caso clássico: labor existe porém é insuficiente e não há viagens.
-# PMóvel deve receber o padrão.
-    if 0 < total_labor < MINIMO_LIQUIDO and not arrivals and not departures:
-        entrada = HORA_PADRAO_IN
-        saida = HORA_PADRAO_OUT
+    # PMóvel deve receber o padrão.
+    if 0 < total_labor < minimo_liquido and not arrivals and not departures:
         return (
-            entrada,
-            saida,
+            politica.hora_padrao_in,
+            politica.hora_padrao_out,
             "padrao_por_labor_curto",
-            f"Labor {total_labor:.2f}h insuficiente e sem viagens; enviado padrão.",
+            f"Labor {_horas_txt(total_labor)}h insuficiente e sem viagens; enviado padrão.",
             [],
             [],
             arrivals[:],
             departures[:]
         )
 
+    if labors:
+        first_labor_start, last_labor_end = iv.envoltoria(labors)
+    else:
+        first_labor_start = last_labor_end = None
 
     # Caso labor suficiente: usamos todo o labor e não tocamos viagens
-    if total_labor >= MINIMO_LIQUIDO and labors:
-        entrada = min(h1 for h1,_ in labors)
-        saida = max(h2 for _,h2 in labors)
-        if entrada < HORA_MIN_INICIO:
-            entrada = HORA_MIN_INICIO
-        status = "labor_suficiente"
-        descricao = f"Labor {total_labor:.2f}h >= {MINIMO_LIQUIDO:.2f}h; enviar labor completo."
-        if total_labor > LIMITE_DIA:
-            status = "labor_suficiente_tac_required"
-            descricao += " (labor > 10h: TAC requerido)"
+    if total_labor >= minimo_liquido and labors:
+        entrada = first_labor_start if first_labor_start > hora_min_inicio else hora_min_inicio
+        descricao = f"Labor {_horas_txt(total_labor)}h >= {politica.minimo_liquido_txt}h; enviar labor completo."
+        if total_labor > limite_dia:
+            return (entrada, last_labor_end, "labor_suficiente_tac_required",
+                    f"{descricao} (labor > {limite_dia}h: TAC requerido)", [], [], arrivals[:], departures[:])
         # no arrivals/departures used
-        return entrada, saida, status, descricao, [], [], leftover_arr, leftover_dep
+        return entrada, last_labor_end, "labor_suficiente", descricao, [], [], arrivals[:], departures[:]
 
     # Caso sem labor (somente viagens):
     if not labors:
-        total_arr_dep = duracao_horas(arrivals + departures)
-        if total_arr_dep <= LIMITE_DIA:
+        if iv.duracao_horas(arrivals + departures) <= limite_dia:
             # aplicar padrão (não consumir viagens) — já acordado
-            entrada = HORA_PADRAO_IN
-            saida = HORA_PADRAO_OUT
-            return entrada, saida, "padrao_manual", "Sem labor; preenchido padrão.", [], [], leftover_arr, leftover_dep
+            return (politica.hora_padrao_in, politica.hora_padrao_out, "padrao_manual", "Sem labor; preenchido padrão.",
+                    [], [], arrivals[:], departures[:])
         # se precisa construir, consideraremos arrivals+departures como disponíveis
 
     # Precisamos compor bloco que contenha labors completos (se existirem) e
@@ -139,282 +255,286 @@ def alocar_complementos(labors, arrivals, departures):
     # 1) arrivals (do mais cedo ao mais tarde) — só a parte antes do primeiro labor
     # 2) labors (todos completos)
     # 3) departures (do mais cedo ao mais tarde) — só a parte após o último labor
-    # o objetivo: garantir que (saida - entrada) >= BRUTO_NECESSARIO (bruto)
+    # o objetivo: garantir que (saida - entrada) >= bruto_necessario (bruto)
 
-    # calcula entrada base e fim base
-    if labors:
-        first_labor_start = min(h1 for h1,_ in labors)
-        last_labor_end = max(h2 for _,h2 in labors)
-    else:
-        # sem labor, consideramos artificialmente first/last como None e usaremos arrivals/deps
-        first_labor_start = None
-        last_labor_end = None
-
-    # disponíveis: arrivals antes do first_labor_start (considerando parte após 06:30)
-    available_arrivals = []
-    for a1,a2 in arrivals:
-        # considerar apenas parte > 06:30
-        if a2 <= HORA_MIN_INICIO:
-            continue
-        # parcela antes do labor start (se existir), senão parcela inteira antes de flex_end
-        start = max(a1, HORA_MIN_INICIO)
-        end = a2 if first_labor_start is None else min(a2, first_labor_start)
-        if end > start:
-            available_arrivals.append((a1, a2, start, end))  # keep original and usable part
-
-    # disponíveis: departures after last_labor_end (part after last_labor_end)
-    available_departures = []
-    for d1,d2 in departures:
-        if d2 <= HORA_MIN_INICIO:
-            continue
-        start = d1 if last_labor_end is None else max(d1, last_labor_end)
-        end = d2
-        if end > start:
-            available_departures.append((d1, d2, start, end))
+    # disponíveis: parte das arrivals entre 06:30 e o início do 1º labor
+    available_arrivals = iv.recortar(arrivals, hora_min_inicio, first_labor_start) if arrivals else []
+    # disponíveis: parte das departures após o fim do último labor (só as que terminam depois das 06:30)
+    available_departures = iv.recortar(
+        [(d1, d2) for d1, d2 in departures if d2 > hora_min_inicio], last_labor_end
+    ) if departures else []
 
-    # compute current bruto span if labors exist:
     if labors:
-        # entry is either first labor start or earlier if we include arrival
-        # initially set entrada to first labor start (clipped)
-        entrada_candidate = max(first_labor_start, HORA_MIN_INICIO) if first_labor_start else HORA_MIN_INICIO
-        fim_labor = last_labor_end if last_labor_end else entrada_candidate
+        # entrada começa no 1º labor (no mínimo 06:30); fim no último labor
+        current_start = first_labor_start if first_labor_start > hora_min_inicio else hora_min_inicio
+        current_end = last_labor_end
     else:
-        # without labor, choose earliest available arrival start or earliest dep start
-        all_starts = []
-        for a1,a2 in arrivals:
-            if a2 > HORA_MIN_INICIO:
-                all_starts.append(max(a1,HORA_MIN_INICIO))
-        for d1,d2 in departures:
-            if d2 > HORA_MIN_INICIO:
-                all_starts.append(max(d1,HORA_MIN_INICIO))
-        entrada_candidate = min(all_starts) if all_starts else HORA_MIN_INICIO
-        fim_labor = entrada_candidate
-
-    # compute initial bruto from current blocks (labors plus any arrivals we will include)
-    # We'll greedily include arrivals (earliest usable part) until needed, then include departures as needed.
+        # sem labor: começa no início utilizável mais cedo de qualquer viagem
+        all_starts = [max(h1, hora_min_inicio) for h1, h2 in arrivals + departures if h2 > hora_min_inicio]
+        current_start = min(all_starts) if all_starts else hora_min_inicio
+        current_end = current_start
+
     used_arrivals = []
     used_departures = []
-
-    # start with labor span
-    if labors:
-        current_start = entrada_candidate
-        current_end = fim_labor
-    else:
-        current_start = entrada_candidate
-        current_end = entrada_candidate
-
-    current_bruto = (current_end - current_start).total_seconds()/3600
-
-    # need to reach at least BRUTO_NECESSARIO
-    # first, use arrivals in chronological order (they extend the start backward)
-    # Each arrival usable portion (start_use, end_use) is before first_labor_start
-    # Using an arrival extends current_start earlier to min(current_start, start_use) and increases bruto accordingly.
-    for orig_a1, orig_a2, use_start, use_end in sorted(available_arrivals, key=lambda x: x[2]):
-        if current_bruto >= BRUTO_NECESSARIO:
+    # bruto atual em minutos; ">= bruto_necessario" em horas equivale a ">= bruto_minutos"
+    bruto = current_end - current_start
+
+    # primeiro as arrivals em ordem cronológica (estendem a entrada para trás),
+    # pegando só o final necessário de cada parte utilizável
+    if len(available_arrivals) > 1:
+        available_arrivals.sort(key=_inicio)
+    for use_start, use_end in available_arrivals:
+        if bruto >= bruto_minutos:
             break
-        # determine how much of this usable part is needed
-        # if we include all usable part, new_start = min(current_start, use_start)
-        new_start = min(current_start, use_start)
-        added = (current_end - new_start).total_seconds()/3600 - current_bruto
-        # if added <= 0 then nothing new; else include
-        if added > 0:
-            # include only required portion from the usable part: if added >= (use_end-use_start) then include whole usable
-            usable_len = (use_end - use_start).total_seconds()/3600
-            need = BRUTO_NECESSARIO - current_bruto
-            # if need >= usable_len -> take whole usable portion (use_start..use_end); else take partial from the end of usable portion
-            if need >= usable_len:
+        if use_start < current_start:
+            need = bruto_necessario - bruto / 60
+            if need >= (use_end - use_start) / 60:
                 take_start = use_start
             else:
-                # take the last `need` hours from usable segment, so the taken segment ends at use_end and starts at use_end - need
-                take_start = use_end - timedelta(hours=need)
+                take_start = use_end - _horas_em_minutos(need)
                 if take_start < use_start:
                     take_start = use_start
-            take_end = use_end
-            used_arrivals.append((take_start, take_end))
-            current_start = min(current_start, take_start)
-            current_bruto = (current_end - current_start).total_seconds()/3600
-
-    # then, if still not enough, use departures after last labor end (they extend end forward)
-    for orig_d1, orig_d2, use_start, use_end in sorted(available_departures, key=lambda x: x[2]):
-        if current_bruto >= BRUTO_NECESSARIO:
-            break
-        # if current_end < use_start, including departure will extend end to at least use_start, then to use_end
-        # compute new end if we take part
-        # determine portion length available:
-        usable_len = (use_end - use_start).total_seconds()/3600
-        need = BRUTO_NECESSARIO - current_bruto
-        if need <= 0:
+            used_arrivals.append((take_start, use_end))
+            if take_start < current_start:
+                current_start = take_start
+            bruto = current_end - current_start
+
+    # depois, se ainda faltar, as departures (estendem a saída para frente)
+    if len(available_departures) > 1:
+        available_departures.sort(key=_inicio)
+    for use_start, use_end in available_departures:
+        if bruto >= bruto_minutos:
             break
-        if need >= usable_len:
-            take_start = use_start
+        need = bruto_necessario - bruto / 60
+        if need >= (use_end - use_start) / 60:
             take_end = use_end
         else:
-            take_start = use_start
-            take_end = use_start + timedelta(hours=need)
-        used_departures.append((take_start, take_end))
-        current_end = max(current_end, take_end)
-        current_bruto = (current_end - current_start).total_seconds()/3600
-
-    # if still not enough (rare), extend the end artificially (we will not mark this as used_departure)
-    if current_bruto < BRUTO_NECESSARIO:
-        need = BRUTO_NECESSARIO - current_bruto
-        current_end = current_end + timedelta(hours=need)
-        current_end = cap_saida_no_dia(current_end)
-        current_bruto = (current_end - current_start).total_seconds()/3600
-
-    # now we've determined which parts were used: used_arrivals, used_departures
-    # compute leftovers by subtracting used parts from original arrivals/departures
-
-    def subtract_used_from_originals(originals, used_list):
-        leftovers = []
-        used = sorted(used_list, key=lambda x: x[0])
-        for orig in originals:
-            o1,o2 = orig
-            to_process = [(o1,o2)]
-            for u1,u2 in used:
-                new_proc = []
-                for seg in to_process:
-                    s1,s2 = seg
-                    # if no overlap, keep seg
-                    if u2 <= s1 or u1 >= s2:
-                        new_proc.append(seg)
-                    else:
-                        # subtract overlap
-                        parts = subtrair_intervalo((s1,s2), (max(s1,u1), min(s2,u2)))
-                        for p in parts:
-                            new_proc.append(p)
-                to_process = new_proc
-            for p in to_process:
-                # only keep positive-length
-                if p[1] > p[0]:
-                    leftovers.append(p)
-        return leftovers
-
-    leftover_arrivals_final = subtract_used_from_originals(arrivals, used_arrivals)
-    leftover_departures_final = subtract_used_from_originals(departures, used_departures)
-
-    # finalize entrada/saida: entrada = current_start, saida = current_end (cap day)
-    entrada = current_start
-    saida = cap_saida_no_dia(current_end)
-
-    status = "labor_insuficiente_completado"
-    dur_bruto = (saida - entrada).total_seconds() / 3600
-    descricao = (
-        f"Labor {total_labor:.2f}h < {MINIMO_LIQUIDO:.2f}h; "
-        f"completado. Enviado {dur_bruto:.2f}h."
-    )
+            take_end = use_start + _horas_em_minutos(need)
+        used_departures.append((use_start, take_end))
+        if take_end > current_end:
+            current_end = take_end
+        bruto = current_end - current_start
 
-    if (saida - entrada).total_seconds()/3600 > LIMITE_DIA:
-        status += "_tac_required"
-        descricao += " (TAC requerido, >10h)"
-
-    return entrada, saida, status, descricao, used_arrivals, used_departures, leftover_arrivals_final, leftover_departures_final
+    # se ainda faltar (raro), estende a saída artificialmente (não conta como departure usada)
+    if bruto < bruto_minutos:
+        current_end += _horas_em_minutos(bruto_necessario - bruto / 60)
 
-# ------------- FUNÇÃO PRINCIPAL -------------
-def gerar_plano():
-    if not Path(ARQ_REGISTROS).exists():
-        print("Arquivo registros_mensais.json não encontrado.")
-        return
-
-    with open(ARQ_REGISTROS, "r", encoding="utf-8") as f:
-        registros = json.load(f)
-
-    hoje = datetime.today().date()
+    # sobras = originais menos as partes usadas
+    leftover_arrivals_final = iv.subtrair(arrivals, used_arrivals)
+    leftover_departures_final = iv.subtrair(departures, used_departures)
 
-    # ler Salesforce
-    if Path(ARQ_SF).exists():
-        df = pd.read_excel(ARQ_SF, engine="openpyxl")
+    entrada = current_start
+    saida = current_end
+    if saida % iv.MINUTOS_DIA > MAX_DAY_MIN:
+        saida = cap_saida_no_dia(saida)
+
+    descricao = (f"Labor {_horas_txt(total_labor)}h < {politica.minimo_liquido_txt}h; "
+                 f"completado. Enviado {_horas_txt((saida - entrada) / 60)}h.")
+    if saida - entrada >= politica.limite_minutos:  # (saida - entrada) / 60 > limite_dia
+        status = "labor_insuficiente_completado_tac_required"
+        descricao += f" (TAC requerido, >{limite_dia}h)"
     else:
-        df = pd.DataFrame(columns=["Data","Hora início","Hora fim","Tipo"])
+        status = "labor_insuficiente_completado"
+
+    return entrada, saida, status, descricao, used_arrivals, used_departures, leftover_arrivals_final, leftover_departures_final
 
+# ------------- PLANEJAMENTO (sem I/O) -------------
+def normalizar_timesheet(df):
+    """
+    Cópia do timesheet com as colunas esperadas e Data já convertida;
+    o DataFrame recebido não é alterado. None -> timesheet vazio.
+    """
+    if df is None:
+        return pd.DataFrame(columns=COLUNAS_SF)
+    df = df.copy()
     df["Data"] = pd.to_datetime(df.get("Data", pd.NaT), dayfirst=True, errors="coerce")
     df["Hora início"] = df.get("Hora início", "")
     df["Hora fim"] = df.get("Hora fim", "")
     df["Tipo"] = df.get("Tipo", "")
+    return df
 
-    atendimentos_sf = {}
-    for _, row in df.iterrows():
-        if pd.isna(row["Data"]):
-            continue
-        d = row["Data"].strftime("%d/%m/%Y")
-        tipo = str(row.get("Tipo","")).strip().lower()
-        if tipo == "labour":
-            tipo = "labor"
-        h1 = parse_hora(row.get("Hora início"))
-        h2 = parse_hora(row.get("Hora fim"))
-        if h1 and h2:
-            atendimentos_sf.setdefault(d, []).append((tipo, h1, h2))
 
-    plano_final = {}
+def planejar_dia(data_str, info, blocos, politica=POLITICA_PADRAO):
+    """
+    Plano de um dia: info é a linha de registros do dia, blocos o dict
+    {"labor"/"arrival"/"departure": [(h1,h2)]} do Salesforce (None se não houver).
+    Retorna um dict novo; info não é alterado.
+    """
+    novo = dict(info)
+
+    if blocos is not None:
+        entrada, saida, status, desc, used_arr, used_dep, leftover_arr, leftover_dep = alocar_complementos(
+            blocos.get("labor", []), blocos.get("arrival", []), blocos.get("departure", []), politica)
+
+        # prepare viagens (lado B) from leftovers only
+        # apply adjustment -1min only on arrivals leftovers whose end >= 07:30
+        viagens_arr_json = []
+        for h1,h2 in leftover_arr:
+            adj1, adj2 = ajustar_arrival_para_pmovel(h1,h2)
+            viagens_arr_json.append({"inicio": iv.formatar(adj1), "fim": iv.formatar(adj2)})
+
+        # departures leftovers go as-is
+        viagens_dep_json = [{"inicio": iv.formatar(h1), "fim": iv.formatar(h2)} for h1, h2 in leftover_dep]
+
+        novo.update({
+            "in_1": iv.formatar(entrada),
+            "out_1": iv.formatar(saida),
+            "in_2": None, "out_2": None,
+            "in_3": None, "out_3": None,
+            "in_4": None, "out_4": None,
+            "status": status,
+            "descricao_status": desc,
+            "viagens_arrival": viagens_arr_json,
+            "viagens_departure": viagens_dep_json
+        })
+
+    # dia sem SF — preencher padrão se vazio e não feriado/viagem
+    elif info.get("status") == "vazio" and not info.get("feriado") and not info.get("viagem"):
+        novo.update({
+            "in_1": politica.hora_padrao_in_str,
+            "out_1": politica.hora_padrao_out_str,
+            "in_2": None, "out_2": None,
+            "in_3": None, "out_3": None,
+            "in_4": None, "out_4": None,
+            "status": "padrao_manual",
+            "descricao_status": "Preenchido com horário padrão",
+            "viagens_arrival": [],
+            "viagens_departure": []
+        })
+    else:
+        novo["viagens_arrival"] = []
+        novo["viagens_departure"] = []
+    return novo
 
+
+def _dias_uteis(registros, hoje):
+    """(data_str, info) dos dias úteis até hoje, na ordem de registros."""
     for data_str, info in registros.items():
         data_obj = datetime.strptime(data_str, "%d/%m/%Y").date()
         if data_obj.weekday() > 4 or data_obj > hoje:
             continue
+        yield data_str, info
 
-        # default values for travel arrays
-        viagens_arr_json = []
-        viagens_dep_json = []
-
-        if data_str in atendimentos_sf:
-            # split blocks into types
-            blocos = atendimentos_sf[data_str]
-            labors = [(h1,h2) for t,h1,h2 in blocos if t=="labor"]
-            arrivals = [(h1,h2) for t,h1,h2 in blocos if t=="arrival"]
-            departures = [(h1,h2) for t,h1,h2 in blocos if t=="departure"]
-
-            entrada, saida, status, desc, used_arr, used_dep, leftover_arr, leftover_dep = alocar_complementos(labors, arrivals, departures)
-
-            # prepare viagens (lado B) from leftovers only
-            # apply adjustment -1min only on arrivals leftovers whose end >= 07:30
-            for h1,h2 in leftover_arr:
-                adj1, adj2 = ajustar_arrival_para_pmovel(h1,h2)
-                viagens_arr_json.append({"inicio": adj1.strftime("%H:%M"), "fim": adj2.strftime("%H:%M")})
-
-            # departures leftovers go as-is
-            for h1,h2 in leftover_dep:
-                viagens_dep_json.append({"inicio": h1.strftime("%H:%M"), "fim": h2.strftime("%H:%M")})
-
-            novo = dict(info)
-            novo.update({
-                "in_1": entrada.strftime("%H:%M"),
-                "out_1": saida.strftime("%H:%M"),
-                "in_2": None, "out_2": None,
-                "in_3": None, "out_3": None,
-                "in_4": None, "out_4": None,
-                "status": status,
-                "descricao_status": desc,
-                "viagens_arrival": viagens_arr_json,
-                "viagens_departure": viagens_dep_json
-            })
-            plano_final[data_str] = novo
 
+def planejar(registros, timesheet_df, hoje, politica=POLITICA_PADRAO):
+    """
+    Monta o plano a partir dos registros do PMóvel (dict "dd/mm/aaaa" -> info,
+    como em registros_mensais.json) e do timesheet do Salesforce.
+    Não lê nem grava arquivos e não altera as entradas; só dias úteis até
+    `hoje` (date) entram no plano. Retorna o dict do plano.
+    """
+    atendimentos_sf = agrupar_atendimentos_sf(normalizar_timesheet(timesheet_df))
+    return {
+        data_str: planejar_dia(data_str, info, atendimentos_sf.get(data_str), politica)
+        for data_str, info in _dias_uteis(registros, hoje)
+    }
+
+
+def fingerprint_dia(info, blocos, politica=POLITICA_PADRAO):
+    """Hash das entradas de um dia: linha de registros, blocos SF e regras."""
+    bruto = json.dumps([VERSAO_PLANO, politica.chave(), info, blocos], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()
+
+
+def planejar_incremental(registros, timesheet_df, hoje, politica=POLITICA_PADRAO, cache=None):
+    """
+    Como planejar(), mas reaproveita do cache ({data: {"fp", "plano"}}) os
+    dias cujo fingerprint não mudou e só recalcula os demais.
+    Retorna (plano, cache_novo, recalculados); cache_novo só tem os dias do
+    plano atual e recalculados lista as datas refeitas, em ordem.
+    """
+    cache = cache or {}
+    atendimentos_sf = agrupar_atendimentos_sf(normalizar_timesheet(timesheet_df))
+    plano_final, cache_novo, recalculados = {}, {}, []
+
+    for data_str, info in _dias_uteis(registros, hoje):
+        blocos = atendimentos_sf.get(data_str)
+        fp = fingerprint_dia(info, blocos, politica)
+        anterior = cache.get(data_str)
+        if anterior and anterior.get("fp") == fp:
+            dia = anterior["plano"]
         else:
-            # dia sem SF — preencher padrão se vazio e não feriado/viagem
-            if info.get("status") == "vazio" and not info.get("feriado") and not info.get("viagem"):
-                novo = dict(info)
-                novo.update({
-                    "in_1": HORA_PADRAO_IN_STR,
-                    "out_1": HORA_PADRAO_OUT_STR,
-                    "in_2": None, "out_2": None,
-                    "in_3": None, "out_3": None,
-                    "in_4": None, "out_4": None,
-                    "status": "padrao_manual",
-                    "descricao_status": "Preenchido com horário padrão",
-                    "viagens_arrival": [],
-                    "viagens_departure": []
-                })
-                plano_final[data_str] = novo
-            else:
-                info["viagens_arrival"] = []
-                info["viagens_departure"] = []
-                plano_final[data_str] = info
+            dia = planejar_dia(data_str, info, blocos, politica)
+            recalculados.append(data_str)
+        plano_final[data_str] = dia
+        cache_novo[data_str] = {"fp": fp, "plano": dia}
+
+    return plano_final, cache_novo, recalculados
+
+
+def _planejar_item(chave, registros, timesheet_df, hoje, politica):
+    return chave, planejar(registros, timesheet_df, hoje, politica)
+
+
+def planejar_lote(entradas, max_processos=MAX_PROCESSOS):
+    """
+    Roda planejar() para muitas entradas (funcionário, mês) em paralelo.
+    entradas: iterável de (chave, registros, timesheet_df, hoje[, politica]).
+    Gera (chave, plano, erro) na ordem em que cada um termina; erro é None
+    ou a mensagem da exceção (plano None nesse caso).
+    """
+    with ProcessPoolExecutor(max_workers=max_processos) as executor:
+        futuros = {}
+        for entrada in entradas:
+            chave, registros, timesheet_df, hoje, *resto = entrada
+            politica = resto[0] if resto else POLITICA_PADRAO
+            futuros[executor.submit(_planejar_item, chave, registros, timesheet_df, hoje, politica)] = chave
+        for futuro in as_completed(futuros):
+            try:
+                chave, plano = futuro.result()
+                yield chave, plano, None
+            except Exception as e:
+                yield futuros[futuro], None, f"{type(e).__name__}: {e}"
+
+
+# ------------- FUNÇÃO PRINCIPAL -------------
+def gerar_plano(politica=POLITICA_PADRAO, incremental=True):
+    """
+    Lê registros_mensais.json e o timesheet (ARQ_SF), grava ARQ_PLANO e retorna o plano.
+    incremental=True: reaproveita os dias inalterados de ARQ_PLANO_CACHE e grava
+    em ARQ_DIAS_RECALCULADOS as datas refeitas (ver preencher_modal(dias=...)).
+    """
+    if not Path(ARQ_REGISTROS).exists():
+        print("Arquivo registros_mensais.json não encontrado.")
+        return
+
+    with open(ARQ_REGISTROS, "r", encoding="utf-8") as f:
+        registros = json.load(f)
+
+    # ler Salesforce
+    df = ler_excel(ARQ_SF) if Path(ARQ_SF).exists() else None
+    hoje = datetime.today().date()
+
+    if incremental:
+        plano_final, cache, recalculados = planejar_incremental(
+            registros, df, hoje, politica, _carregar_cache(ARQ_PLANO_CACHE)
+        )
+        _gravar_json(ARQ_PLANO_CACHE, cache)
+        _gravar_json(ARQ_DIAS_RECALCULADOS, recalculados)
+        print(f"🔁 {len(recalculados)} dias recalculados, {len(plano_final) - len(recalculados)} do cache")
+    else:
+        plano_final = planejar(registros, df, hoje, politica)
 
     # salvar JSON final
-    with open(ARQ_PLANO, "w", encoding="utf-8") as f:
-        json.dump(plano_final, f, ensure_ascii=False, indent=2)
+    _gravar_json(ARQ_PLANO, plano_final)
 
     print("✅ Plano completo gerado: lado A (trabalho) + lado B (viagens sobrantes).")
+    return plano_final
+
+
+def _carregar_cache(caminho):
+    if not Path(caminho).exists():
+        return {}
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}  # cache corrompido: recalcula tudo
+
+
+def _gravar_json(caminho, dados):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
 
 if __name__ == "__main__":
     gerar_plano()
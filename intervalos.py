@@ -0,0 +1,108 @@
+# intervalos.py
+"""
+Aritmética de intervalos em minutos inteiros, usada pelo gerador de plano.
+
+Um horário é um int: minutos desde 00:00 do dia de referência (pode passar
+de 1440 quando um bloco é estendido além da meia-noite). Um intervalo é a
+tupla (inicio, fim) de ints; listas de intervalos são listas dessas tuplas.
+Tudo aqui é inteiro: nada de datetime/timedelta nem deepcopy.
+"""
+
+from datetime import datetime
+
+MINUTOS_DIA = 24 * 60
+_BASE = datetime(1900, 1, 1)  # data que strptime("%H:%M") devolve
+
+
+def minutos(h):
+    """datetime/"HH:MM" -> minutos inteiros desde 00:00 de 1900-01-01."""
+    if isinstance(h, str):
+        hh, mm = h.strip().split(":")
+        return int(hh) * 60 + int(mm)
+    delta = h - _BASE
+    return delta.days * MINUTOS_DIA + delta.seconds // 60
+
+
+def formatar(m):
+    """Minutos -> "HH:MM" (hora do dia, como strftime faria no datetime)."""
+    m %= MINUTOS_DIA
+    return f"{m // 60:02d}:{m % 60:02d}"
+
+
+def hora_do_dia(m):
+    """Minutos desde 00:00 do próprio dia (equivalente a datetime.time())."""
+    return m % MINUTOS_DIA
+
+
+def duracao_horas(intervalos):
+    """Soma das durações em horas (float, acumulado na mesma ordem da lista)."""
+    total = 0.0
+    for a, b in intervalos:
+        total += (b - a) / 60
+    return total
+
+
+def envoltoria(intervalos):
+    """(menor início, maior fim) de uma lista não vazia."""
+    inicio, fim = intervalos[0]
+    for a, b in intervalos:
+        if a < inicio:
+            inicio = a
+        if b > fim:
+            fim = b
+    return inicio, fim
+
+
+def uniao(intervalos):
+    """União por varredura ordenada; descarta intervalos vazios ou invertidos."""
+    resultado = []
+    for a, b in sorted(intervalos):
+        if b <= a:
+            continue
+        if resultado and a <= resultado[-1][1]:
+            if b > resultado[-1][1]:
+                resultado[-1] = (resultado[-1][0], b)
+        else:
+            resultado.append((a, b))
+    return resultado
+
+
+def subtrair(originais, usados):
+    """
+    Cada original menos a união dos usados, na ordem dos originais.
+    Só sobram pedaços de comprimento positivo.
+    """
+    if not usados:
+        return [(a, b) for a, b in originais if b > a]
+    if len(usados) == 1 and usados[0][1] > usados[0][0]:
+        cortes = usados  # um intervalo válido já é a própria união
+    else:
+        cortes = uniao(usados)
+    sobras = []
+    for o1, o2 in originais:
+        inicio = o1
+        for u1, u2 in cortes:
+            if u2 <= inicio:
+                continue
+            if u1 >= o2:
+                break
+            if u1 > inicio:
+                sobras.append((inicio, u1))
+            if u2 > inicio:
+                inicio = u2
+        if o2 > inicio:
+            sobras.append((inicio, o2))
+    return sobras
+
+
+def recortar(intervalos, inicio=None, fim=None):
+    """Recorta cada intervalo para [inicio, fim]; some com o que ficar vazio."""
+    resultado = []
+    for a, b in intervalos:
+        if inicio is not None and a < inicio:
+            a = inicio
+        if fim is not None and b > fim:
+            b = fim
+        if b > a:
+            resultado.append((a, b))
+    return resultado
@@ -1,81 +1,226 @@
 import json
+from pathlib import Path
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException
 
-def ler_tabela_registros(browser):
-    wait = WebDriverWait(browser, 10)
+from parser_registros import (extrair_linhas_html, fingerprint_bruto, linhas_html_com_fingerprint, montar_registro,
+                              montar_registros_incremental, precisa_extrair)
 
-    # Espera a tabela carregar completamente
-    tabela = wait.until(
-        EC.presence_of_element_located((By.XPATH, "//table[contains(@class, 'table')]"))
-    )
+ARQ_REGISTROS = "registros_mensais.json"
+ARQ_FINGERPRINTS = "registros_fingerprints.json"
+ARQ_ALTERACOES = "registros_alteracoes.json"
+
+XPATH_TABELA = "//table[contains(@class, 'table')]"
+
+# Coleta a tabela inteira numa única chamada ao chromedriver.
+# Para cada <tr> devolve o texto de cada <td>, os spans das colunas In/Out,
+# o tooltip da coluna de status e o texto da linha (para detectar TAC).
+JS_EXTRAIR_TABELA = """
+const tabela = document.evaluate(arguments[0], document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!tabela) { return null; }
+const texto = el => (el.innerText || "").trim();
+const trs = Array.from(tabela.querySelectorAll("tr"));
+const indices = arguments[1] || trs.map((_, i) => i);
+return indices.map(i => trs[i]).map(tr => {
+    const tds = Array.from(tr.querySelectorAll("td"));
+    return {
+        celulas: tds.map(texto),
+        spans: tds.slice(3, 11).map(td => Array.from(td.querySelectorAll("span")).map(texto)),
+        hover: tds.length > 3 ? (tds[3].getAttribute("data-original-title") || "") : "",
+        texto_linha: tr.innerText || ""
+    };
+});
+"""
+
+
+# Primeira passada da leitura incremental: por <tr>, só a data e um hash
+# (cyrb53) do outerHTML, calculado no navegador. As linhas que mudaram são
+# lidas depois com JS_EXTRAIR_TABELA passando os índices.
+JS_FINGERPRINTS = """
+const tabela = document.evaluate(arguments[0], document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!tabela) { return null; }
+const cyrb53 = str => {
+    let h1 = 0xdeadbeef, h2 = 0x41c6ce57;
+    for (let i = 0; i < str.length; i++) {
+        const ch = str.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return (h2 >>> 0).toString(16).padStart(8, "0") + (h1 >>> 0).toString(16).padStart(8, "0");
+};
+return Array.from(tabela.querySelectorAll("tr")).map(tr => {
+    const tds = tr.querySelectorAll("td");
+    if (tds.length < 3) { return [null, null]; }
+    return [(tds[0].innerText || "").trim(), cyrb53(tr.outerHTML)];
+});
+"""
+
+
+def _linhas_por_script(browser):
+    """Extrai todas as linhas com um único execute_script (um round trip)."""
+    linhas = browser.execute_script(JS_EXTRAIR_TABELA, XPATH_TABELA)
+    if linhas is None:
+        raise WebDriverException("Tabela de registros não encontrada pelo script")
+
+    for linha in linhas[1:]:  # pula o cabeçalho
+        yield linha["celulas"], linha["spans"], linha["hover"], linha["texto_linha"]
+
+
+def _linhas_por_script_com_fingerprint(browser, registros_anteriores, fingerprints_anteriores):
+    """
+    Leitura incremental por script: um execute_script com data + hash de
+    cada linha e outro só com as linhas que mudaram. Gera (data, fp, extrair).
+    """
+    resumo = browser.execute_script(JS_FINGERPRINTS, XPATH_TABELA)
+    if resumo is None:
+        raise WebDriverException("Tabela de registros não encontrada pelo script")
+
+    mudaram = [i for i, (data_texto, fp) in enumerate(resumo) if i > 0 and data_texto is not None
+               and precisa_extrair(data_texto, fp, registros_anteriores, fingerprints_anteriores)]
+    detalhes = {}
+    if mudaram:
+        lidas = browser.execute_script(JS_EXTRAIR_TABELA, XPATH_TABELA, mudaram)
+        for i, linha in zip(mudaram, lidas):
+            detalhes[i] = (linha["celulas"], linha["spans"], linha["hover"], linha["texto_linha"])
+
+    for i, (data_texto, fp) in enumerate(resumo[1:], start=1):  # pula o cabeçalho
+        yield data_texto, fp, lambda i=i: detalhes[i]
+
+
+def _ler_linha_elementos(linha, colunas):
+    celulas = [c.text.strip() for c in colunas[:3]]
+    celulas.append(colunas[3].text.strip())
+    spans = [
+        [span.text.strip() for span in colunas[i].find_elements(By.TAG_NAME, "span")]
+        for i in range(3, 11)
+    ]
+    status_hover = colunas[3].get_attribute("data-original-title") or ""
+    return celulas, spans, status_hover, linha.text
+
+
+def _linhas_por_elementos_com_fingerprint(tabela):
+    """
+    Leitura incremental por elementos: por linha só outerHTML, as células e o
+    texto da data (3 chamadas); o resto só nas linhas que mudaram.
+    """
     linhas = tabela.find_elements(By.XPATH, ".//tr")
 
-    registros = {}
+    for linha in linhas[1:]:  # pula o cabeçalho
+        colunas = linha.find_elements(By.TAG_NAME, "td")
+        if len(colunas) < 3:
+            yield None, None, None
+            continue
+        fp = fingerprint_bruto(linha.get_attribute("outerHTML") or "")
+        yield colunas[0].text.strip(), fp, lambda linha=linha, colunas=colunas: _ler_linha_elementos(linha, colunas)
+
+
+def _linhas_por_elementos(tabela):
+    """Caminho antigo: uma chamada ao WebDriver por linha, célula e span."""
+    linhas = tabela.find_elements(By.XPATH, ".//tr")
 
     for linha in linhas[1:]:  # pula o cabeçalho
         colunas = linha.find_elements(By.TAG_NAME, "td")
         if len(colunas) < 3:
+            yield [], [], "", ""
             continue
 
-        data_texto = colunas[0].text.strip()
-        dia_semana = colunas[1].text.strip()
-        turno = colunas[2].text.strip()
-
-        # Inicializa horários
-        horarios = []
-        for i in range(3, 11):  # colunas de In/Out 1 a 4
-            spans = colunas[i].find_elements(By.TAG_NAME, "span")
-            hora = None
-            for span in spans:
-                text = span.text.strip()
-                if text and ":" in text:
-                    hora = text
-                    break
-            horarios.append(hora)
-
-        # Mapear para in/out
-        registro_horas = {
-            "in_1": horarios[0],
-            "out_1": horarios[1],
-            "in_2": horarios[2],
-            "out_2": horarios[3],
-            "in_3": horarios[4],
-            "out_3": horarios[5],
-            "in_4": horarios[6],
-            "out_4": horarios[7]
-        }
-
-        # Detecta status avançado
-        status_coluna = colunas[3]
-        status_texto = status_coluna.text.strip()
-        status_hover = status_coluna.get_attribute("data-original-title") or ""
-        feriado = status_texto.lower() in ["feriado", "holiday"]
-        justificado = status_texto.lower() == "justif."
-        viagem = status_texto.lower() == "viagem"
-
-        if not any(horarios):
-            status = "vazio"
-        elif "TAC" in linha.text.upper():
-            status = "TAC"
-        else:
-            status = "ok"
-
-        registros[data_texto] = {
-            "dia_semana": dia_semana,
-            "turno": turno,
-            **registro_horas,
-            "status": status,
-            "feriado": feriado,
-            "justificado": justificado,
-            "viagem": viagem,
-            "descricao_status": status_hover
-        }
+        yield _ler_linha_elementos(linha, colunas)
+
+
+def ler_tabela_registros(browser, modo="html", incremental=True):
+    """
+    modo="html": faz o parse offline de browser.page_source (padrão).
+    modo="script": lê a tabela inteira com um único execute_script.
+    modo="elementos": percorre a tabela elemento por elemento (fallback).
+    Se o modo html ou script falhar, cai automaticamente no modo elementos.
+
+    incremental=True: guarda um fingerprint por data, tirado do HTML bruto da
+    linha antes de ler as células, e só lê por inteiro as linhas que mudaram
+    desde a última leitura; as datas adicionadas/alteradas/removidas são
+    gravadas em registros_alteracoes.json.
+    """
+    wait = WebDriverWait(browser, 10)
+
+    # Espera a tabela carregar completamente
+    tabela = wait.until(
+        EC.presence_of_element_located((By.XPATH, XPATH_TABELA))
+    )
+
+    if incremental:
+        registros_anteriores = _carregar_json(ARQ_REGISTROS)
+        fingerprints_anteriores = _carregar_json(ARQ_FINGERPRINTS)
+        linhas = None
+        if modo == "html":
+            try:
+                linhas = list(linhas_html_com_fingerprint(browser.page_source))
+            except ValueError as e:
+                print("⚠️ Parse do HTML falhou, usando leitura por elementos:", e)
+        elif modo == "script":
+            try:
+                linhas = list(_linhas_por_script_com_fingerprint(browser, registros_anteriores, fingerprints_anteriores))
+            except WebDriverException as e:
+                print("⚠️ Extração por script falhou, usando leitura por elementos:", e)
+        if linhas is None:
+            linhas = _linhas_por_elementos_com_fingerprint(tabela)
+
+        registros, fingerprints, alteracoes = montar_registros_incremental(
+            linhas, registros_anteriores, fingerprints_anteriores
+        )
+        _gravar_json(ARQ_FINGERPRINTS, fingerprints)
+        _gravar_json(ARQ_ALTERACOES, alteracoes)
+        print(
+            f"🔎 Registros: {len(alteracoes['adicionados'])} adicionados, "
+            f"{len(alteracoes['alterados'])} alterados, {len(alteracoes['removidos'])} removidos"
+        )
+        if not (alteracoes["adicionados"] or alteracoes["alterados"] or alteracoes["removidos"]):
+            print(f"✅ Nenhuma alteração; {ARQ_REGISTROS} mantido ({len(registros)} registros)")
+            return registros
+    else:
+        linhas = None
+        if modo == "html":
+            try:
+                linhas = list(extrair_linhas_html(browser.page_source))
+            except ValueError as e:
+                print("⚠️ Parse do HTML falhou, usando leitura por elementos:", e)
+        elif modo == "script":
+            try:
+                linhas = list(_linhas_por_script(browser))
+            except WebDriverException as e:
+                print("⚠️ Extração por script falhou, usando leitura por elementos:", e)
+        if linhas is None:
+            linhas = _linhas_por_elementos(tabela)
+
+        registros = {}
+        for celulas, spans, status_hover, texto_linha in linhas:
+            resultado = montar_registro(celulas, spans, status_hover, texto_linha)
+            if resultado is None:
+                continue
+            data_texto, registro = resultado
+            registros[data_texto] = registro
 
     # Salva como JSON
-    with open("registros_mensais.json", "w", encoding="utf-8") as f:
-        json.dump(registros, f, indent=2, ensure_ascii=False)
+    _gravar_json(ARQ_REGISTROS, registros)
 
-    print(f"✅ {len(registros)} registros extraídos e salvos em registros_mensais.json")
+    print(f"✅ {len(registros)} registros extraídos e salvos em {ARQ_REGISTROS}")
     return registros
+
+
+def _carregar_json(caminho):
+    if not Path(caminho).exists():
+        return {}
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_json(caminho, dados):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,99 @@
+# navegacao_pmovel.py
+"""
+Login no PMóvel e navegação até a tabela de Registros do mês atual.
+Usado pelo main.py (uma conta, credenciais do .env) e pelo orquestrador.py
+(várias contas em paralelo).
+"""
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+from prontidao import aguardar_elemento, aguardar_estavel, etapa, marcar
+from sessao_cache import ARQ_SESSAO, restaurar_sessao, salvar_sessao
+
+URL_PMOVEL = "https://www.pmovel.com.br/"
+XPATH_MENU_REGISTROS = "//ul//a[contains(translate(., 'REGISTROS', 'registros'), 'registros')]"
+XPATH_TABELA = "//table[contains(@class, 'table') or contains(@id, 'registros')]"
+XPATH_LINHAS = "//table[contains(@class, 'table')]/tbody/tr"
+
+
+def fazer_login(browser, usuario, senha):
+    browser.get(URL_PMOVEL)
+    try:
+        email_input = aguardar_elemento(browser, "//input[@name='email']", "formulário de login")
+        senha_input = browser.find_element(By.NAME, "password")
+        botao_login = browser.find_element(
+            By.XPATH,
+            "//form//button[@type='submit' or contains(@class, 'btn')]"
+        )
+
+        email_input.send_keys(usuario)
+        senha_input.send_keys(senha)
+        botao_login.click()
+
+    except Exception as e:
+        print("❌ Erro ao tentar logar:", e)
+        browser.quit()
+        raise
+
+
+def selecionar_mes_atual(browser):
+    # Tenta selecionar 'Mês Atual' no dropdown; cada passo espera o sinal de
+    # prontidão da página em vez de um timeout fixo
+    try:
+        range_btn = aguardar_elemento(browser, "//*[@id='Areportrange']", "seletor de período")
+        range_btn.click()
+
+        mes_atual_item = aguardar_elemento(
+            browser,
+            "//ul/li[contains(@data-range-key, 'Mês Atual') or contains(@data-range-key, 'This Month')]",
+            "opção 'Mês Atual'"
+        )
+        mes_atual_item.click()
+
+        aplicar_btn = aguardar_elemento(
+            browser,
+            "//button[contains(@class,'applyBtn') and (text()='Aplicar' or text()='Apply')]",
+            "botão Aplicar"
+        )
+        marco = marcar(browser)
+        aplicar_btn.click()
+        aguardar_estavel(browser, "tabela do mês atual", marco=marco, xpath_linhas=XPATH_LINHAS)
+        print("✅ Dropdown 'Mês Atual' selecionado e tabela completa carregada!")
+
+    except WebDriverException as e:
+        print("⚠️ Não foi possível selecionar 'Mês Atual':", e.msg if hasattr(e, "msg") else e)
+
+
+def abrir_registros(browser, usuario, senha, arq_sessao=ARQ_SESSAO):
+    """
+    Deixa o navegador na tabela de Registros do mês atual, reaproveitando a
+    sessão salva quando possível e fazendo login quando não.
+    """
+    # --- Reaproveita a sessão salva ou faz login ---
+    with etapa("sessão/login"):
+        sessao_restaurada = restaurar_sessao(browser, arq_sessao, senha=senha)
+
+        if not sessao_restaurada:
+            fazer_login(browser, usuario, senha)
+
+    # --- Aguarda menu principal e acessa 'Registros' ---
+    try:
+        if not sessao_restaurada:
+            with etapa("menu"):
+                # logo após o submit o documento antigo ainda está quieto: não desistir por isso
+                menu_registros = aguardar_elemento(browser, XPATH_MENU_REGISTROS, "menu principal",
+                                                   desistir_quieto=False)
+                print("✅ Login bem-sucedido e menu carregado!")
+                menu_registros.click()
+
+        with etapa("tabela de registros"):
+            aguardar_elemento(browser, XPATH_TABELA, "tabela de registros")
+            if not sessao_restaurada:
+                salvar_sessao(browser, url_registros=browser.current_url, caminho=arq_sessao, senha=senha)
+
+        with etapa("mês atual"):
+            selecionar_mes_atual(browser)
+
+    except Exception as e:
+        print("⚠️ Erro ao acessar 'Meus registros', mas continuando:", e)
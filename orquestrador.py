@@ -0,0 +1,130 @@
+# orquestrador.py
+"""
+Executa o fluxo mensal (login -> ler_tabela_registros -> gerar_plano ->
+preencher_modal) para várias contas PMóvel em paralelo.
+
+Cada conta roda num processo próprio, com navegador, pasta de trabalho e
+arquivos de saída próprios (contas/<nome>/registros_mensais.json, plano,
+diário, cache de sessão e execucao.log). O número de contas simultâneas é
+limitado por MAX_PROCESSOS. Ao final grava resumo_contas.json.
+
+contas.json:
+    [
+      {"nome": "joao", "usuario": "joao@empresa.com", "senha_env": "PMOVEL_PASS_JOAO",
+       "timesheet": "C:/timesheets/joao.xlsx", "preencher": false},
+      ...
+    ]
+(a senha pode vir direto em "senha" ou de uma variável do .env em "senha_env")
+
+Uso:
+    python orquestrador.py contas.json [max_processos]
+"""
+
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout, redirect_stderr
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ARQ_CONTAS = "contas.json"
+DIR_CONTAS = "contas"
+ARQ_RESUMO = "resumo_contas.json"
+MAX_PROCESSOS = 4
+
+
+def _senha_da_conta(conta):
+    if conta.get("senha"):
+        return conta["senha"]
+    return os.getenv(conta.get("senha_env", ""), "")
+
+
+def executar_conta(conta, dir_base=DIR_CONTAS, perfil="headless"):
+    """
+    Roda o fluxo completo de uma conta dentro de dir_base/<nome>.
+    Executa num processo separado; retorna o resumo da conta.
+    """
+    # imports aqui: cada processo carrega Selenium/pandas só quando precisa
+    import gerar_plano as modulo_plano
+    from leitura_tabela import ler_tabela_registros
+    from navegacao_pmovel import abrir_registros
+    from pool_navegadores import pool_padrao
+    from preencher_registros import preencher_modal
+
+    load_dotenv()
+    nome = conta["nome"]
+    pasta = Path(dir_base, nome).resolve()
+    pasta.mkdir(parents=True, exist_ok=True)
+    if conta.get("timesheet"):
+        modulo_plano.ARQ_SF = str(Path(conta["timesheet"]).resolve())
+
+    resumo = {"nome": nome, "ok": False, "registros": 0, "dias_no_plano": 0,
+              "preenchido": False, "erro": None, "segundos": 0.0}
+    inicio = time.perf_counter()
+    dir_original = os.getcwd()
+    os.chdir(pasta)
+    try:
+        with open("execucao.log", "w", encoding="utf-8") as log, redirect_stdout(log), redirect_stderr(log):
+            with pool_padrao().navegador(perfil) as browser:
+                abrir_registros(browser, conta["usuario"], _senha_da_conta(conta))
+                registros = ler_tabela_registros(browser)
+                resumo["registros"] = len(registros)
+
+                modulo_plano.gerar_plano()
+                if Path(modulo_plano.ARQ_PLANO).exists():
+                    with open(modulo_plano.ARQ_PLANO, "r", encoding="utf-8") as f:
+                        resumo["dias_no_plano"] = len(json.load(f))
+
+                if conta.get("preencher"):
+                    preencher_modal(browser, plano_json_path=modulo_plano.ARQ_PLANO)
+                    resumo["preenchido"] = True
+        resumo["ok"] = True
+    except Exception as e:
+        resumo["erro"] = f"{type(e).__name__}: {e}"
+        with open(pasta / "execucao.log", "a", encoding="utf-8") as log:
+            traceback.print_exc(file=log)
+    finally:
+        os.chdir(dir_original)
+        resumo["segundos"] = round(time.perf_counter() - inicio, 1)
+    return resumo
+
+
+def orquestrar(contas, max_processos=MAX_PROCESSOS, dir_base=DIR_CONTAS, perfil="headless"):
+    """Roda todas as contas com no máximo `max_processos` ao mesmo tempo."""
+    resumos = []
+    max_processos = max(1, min(max_processos, len(contas)))
+    print(f"🚀 {len(contas)} contas, até {max_processos} em paralelo")
+
+    # max_tasks_per_child=1: processo novo por conta (nada de estado vazando entre contas)
+    with ProcessPoolExecutor(max_workers=max_processos, max_tasks_per_child=1) as executor:
+        futuros = {executor.submit(executar_conta, conta, dir_base, perfil): conta["nome"] for conta in contas}
+        for futuro in as_completed(futuros):
+            try:
+                resumo = futuro.result()
+            except Exception as e:  # processo morreu (ex.: falta de memória)
+                resumo = {"nome": futuros[futuro], "ok": False, "erro": f"{type(e).__name__}: {e}"}
+            resumos.append(resumo)
+            marca = "✅" if resumo["ok"] else "❌"
+            print(f"{marca} {resumo['nome']}: {resumo.get('registros', 0)} registros, "
+                  f"{resumo.get('dias_no_plano', 0)} dias no plano, {resumo.get('segundos', '?')}s"
+                  + (f" — {resumo['erro']}" if resumo.get("erro") else ""))
+
+    resumos.sort(key=lambda r: r["nome"])
+    with open(ARQ_RESUMO, "w", encoding="utf-8") as f:
+        json.dump(resumos, f, indent=2, ensure_ascii=False)
+    ok = sum(1 for r in resumos if r["ok"])
+    print(f"🎉 {ok}/{len(resumos)} contas concluídas; resumo em {ARQ_RESUMO}")
+    return resumos
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    arq_contas = sys.argv[1] if len(sys.argv) > 1 else ARQ_CONTAS
+    max_processos = int(sys.argv[2]) if len(sys.argv) > 2 else MAX_PROCESSOS
+    with open(arq_contas, "r", encoding="utf-8") as f:
+        contas = json.load(f)
+    orquestrar(contas, max_processos)
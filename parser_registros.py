@@ -0,0 +1,313 @@
+# parser_registros.py
+"""
+Parser offline da página de Registros do PMóvel.
+Recebe o HTML (browser.page_source ou um arquivo salvo) e devolve o mesmo
+dicionário que ler_tabela_registros grava em registros_mensais.json,
+sem precisar de navegador.
+
+Uso em lote (páginas arquivadas):
+    python parser_registros.py fixtures/registros_mes.html [outra.html ...]
+"""
+
+import hashlib
+import json
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+
+TAGS_VAZIAS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+               "link", "meta", "param", "source", "track", "wbr"}
+TAGS_IGNORADAS = {"script", "style", "template"}
+
+
+def montar_registro(celulas, spans_horarios, status_hover, texto_linha):
+    """
+    Monta o registro de uma linha da tabela a partir dos textos já extraídos.
+    celulas: textos dos <td> da linha
+    spans_horarios: para cada coluna In/Out (8), a lista de textos dos <span>
+    Retorna (data_texto, registro) ou None se a linha não é de dados.
+    """
+    if len(celulas) < 3:
+        return None
+
+    data_texto = celulas[0]
+    dia_semana = celulas[1]
+    turno = celulas[2]
+
+    # Inicializa horários
+    horarios = []
+    for spans in spans_horarios:  # colunas de In/Out 1 a 4
+        hora = None
+        for text in spans:
+            if text and ":" in text:
+                hora = text
+                break
+        horarios.append(hora)
+
+    # Mapear para in/out
+    registro_horas = {
+        "in_1": horarios[0],
+        "out_1": horarios[1],
+        "in_2": horarios[2],
+        "out_2": horarios[3],
+        "in_3": horarios[4],
+        "out_3": horarios[5],
+        "in_4": horarios[6],
+        "out_4": horarios[7]
+    }
+
+    # Detecta status avançado
+    status_texto = celulas[3]
+    feriado = status_texto.lower() in ["feriado", "holiday"]
+    justificado = status_texto.lower() == "justif."
+    viagem = status_texto.lower() == "viagem"
+
+    if not any(horarios):
+        status = "vazio"
+    elif "TAC" in texto_linha.upper():
+        status = "TAC"
+    else:
+        status = "ok"
+
+    return data_texto, {
+        "dia_semana": dia_semana,
+        "turno": turno,
+        **registro_horas,
+        "status": status,
+        "feriado": feriado,
+        "justificado": justificado,
+        "viagem": viagem,
+        "descricao_status": status_hover
+    }
+
+
+class _No:
+    __slots__ = ("tag", "attrs", "filhos", "posicao")
+
+    def __init__(self, tag, attrs, posicao=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.filhos = []
+        self.posicao = posicao  # (linha, coluna) da tag de abertura no HTML
+
+    def texto(self):
+        partes = []
+        self._coletar_texto(partes)
+        return re.sub(r"\s+", " ", " ".join(partes)).strip()
+
+    def _coletar_texto(self, partes):
+        for filho in self.filhos:
+            if isinstance(filho, str):
+                partes.append(filho)
+            elif filho.tag == "br":
+                partes.append("\n")
+            else:
+                filho._coletar_texto(partes)
+
+    def descendentes(self, tag):
+        for filho in self.filhos:
+            if isinstance(filho, _No):
+                if filho.tag == tag:
+                    yield filho
+                yield from filho.descendentes(tag)
+
+
+class _ParserTabela(HTMLParser):
+    """Monta uma árvore mínima apenas da primeira <table class='...table...'>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tabela = None
+        self.pilha = []
+        self.ignorando = 0
+        self.terminou = False
+        self.posicao_fim = None  # (linha, coluna) do </table>
+
+    def handle_starttag(self, tag, attrs):
+        if self.terminou:
+            return
+        if tag in TAGS_IGNORADAS:
+            self.ignorando += 1
+            return
+        attrs = {k: (v or "") for k, v in attrs}
+
+        if not self.pilha:
+            if tag == "table" and "table" in attrs.get("class", ""):
+                self.tabela = _No(tag, attrs)
+                self.pilha.append(self.tabela)
+            return
+
+        # fecha implicitamente <td>/<th>/<tr> que ficaram abertos
+        if tag in ("td", "th", "tr"):
+            fechar = ("td", "th") if tag in ("td", "th") else ("td", "th", "tr")
+            while self.pilha[-1].tag in fechar and len(self.pilha) > 1:
+                self.pilha.pop()
+
+        no = _No(tag, attrs, self.getpos() if tag == "tr" else None)
+        self.pilha[-1].filhos.append(no)
+        if tag not in TAGS_VAZIAS:
+            self.pilha.append(no)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if self.pilha and self.pilha[-1].tag == tag and tag not in TAGS_VAZIAS:
+            self.pilha.pop()
+
+    def handle_endtag(self, tag):
+        if tag in TAGS_IGNORADAS:
+            self.ignorando = max(0, self.ignorando - 1)
+            return
+        if not self.pilha:
+            return
+        for i in range(len(self.pilha) - 1, -1, -1):
+            if self.pilha[i].tag == tag:
+                del self.pilha[i:]
+                break
+        if not self.pilha:
+            self.terminou = True
+            self.posicao_fim = self.getpos()
+
+    def handle_data(self, data):
+        if self.pilha and not self.ignorando:
+            self.pilha[-1].filhos.append(data)
+
+
+def _parse_tabela(html):
+    parser = _ParserTabela()
+    parser.feed(html)
+    parser.close()
+    if parser.tabela is None:
+        raise ValueError("Tabela de registros não encontrada no HTML")
+    return parser
+
+
+def _extrair_linha(linha, colunas):
+    """(celulas, spans_horarios, status_hover, texto_linha) de um <tr> já parseado."""
+    if len(colunas) < 3:
+        return [], [], "", ""
+    celulas = [c.texto() for c in colunas]
+    spans = [[s.texto() for s in col.descendentes("span")] for col in colunas[3:11]]
+    status_hover = colunas[3].attrs.get("data-original-title", "") if len(colunas) > 3 else ""
+    return celulas, spans, status_hover, linha.texto()
+
+
+def extrair_linhas_html(html):
+    """
+    Gera, para cada linha de dados (pula o cabeçalho), a tupla
+    (celulas, spans_horarios, status_hover, texto_linha) usada por montar_registro.
+    """
+    parser = _parse_tabela(html)
+    linhas = list(parser.tabela.descendentes("tr"))
+    for linha in linhas[1:]:  # pula o cabeçalho
+        yield _extrair_linha(linha, list(linha.descendentes("td")))
+
+
+def fingerprint_bruto(texto):
+    """Hash do trecho bruto de uma linha (HTML/texto como veio da página)."""
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def linhas_html_com_fingerprint(html):
+    """
+    Para cada linha de dados gera (data, fingerprint, extrair): o fingerprint
+    é o hash do HTML bruto do <tr> (do seu início ao do próximo) e só a
+    célula da data é lida; extrair() lê a linha inteira (mesma tupla de
+    extrair_linhas_html) e só é chamado para as linhas que mudaram.
+    Linhas com menos de 3 células vêm com data None.
+    """
+    parser = _parse_tabela(html)
+    inicios_linha = [0] + [m.end() for m in re.finditer("\n", html)]
+
+    def deslocamento(posicao):
+        linha, coluna = posicao
+        return inicios_linha[linha - 1] + coluna
+
+    linhas = list(parser.tabela.descendentes("tr"))
+    fim_tabela = deslocamento(parser.posicao_fim) if parser.posicao_fim else len(html)
+    limites = [deslocamento(linha.posicao) for linha in linhas] + [fim_tabela]
+    for i, linha in enumerate(linhas[1:], start=1):  # pula o cabeçalho
+        colunas = list(linha.descendentes("td"))
+        if len(colunas) < 3:
+            yield None, None, None
+            continue
+        fp = fingerprint_bruto(html[limites[i]:limites[i + 1]])
+        yield colunas[0].texto(), fp, lambda linha=linha, colunas=colunas: _extrair_linha(linha, colunas)
+
+
+def parse_registros_html(html):
+    """HTML da página de Registros -> dict no formato de registros_mensais.json."""
+    registros = {}
+    for celulas, spans, status_hover, texto_linha in extrair_linhas_html(html):
+        resultado = montar_registro(celulas, spans, status_hover, texto_linha)
+        if resultado is None:
+            continue
+        data_texto, registro = resultado
+        registros[data_texto] = registro
+    return registros
+
+
+def precisa_extrair(data_texto, fp, registros_anteriores, fingerprints_anteriores):
+    """A linha dessa data tem de ser lida por inteiro (nova ou com fingerprint diferente)?"""
+    return data_texto not in registros_anteriores or fingerprints_anteriores.get(data_texto) != fp
+
+
+def montar_registros_incremental(linhas, registros_anteriores, fingerprints_anteriores):
+    """
+    Monta os registros lendo por inteiro só as linhas cujo fingerprint mudou.
+    linhas: (data, fingerprint, extrair) como em linhas_html_com_fingerprint;
+    extrair() devolve a tupla de montar_registro e não é chamado para as
+    linhas com o mesmo fingerprint da leitura anterior.
+    Retorna (registros, fingerprints, alteracoes) onde alteracoes tem as
+    listas de datas "adicionados", "alterados" e "removidos". Linha com
+    fingerprint novo mas registro igual ao anterior (ex.: mudou só a marcação
+    da página) não conta como alterada.
+    """
+    registros = {}
+    fingerprints = {}
+    adicionados = []
+    alterados = []
+
+    for data_texto, fp, extrair in linhas:
+        if data_texto is None:
+            continue
+        fingerprints[data_texto] = fp
+
+        anterior = registros_anteriores.get(data_texto)
+        if not precisa_extrair(data_texto, fp, registros_anteriores, fingerprints_anteriores):
+            registros[data_texto] = anterior
+            continue
+
+        _, registro = montar_registro(*extrair())
+        registros[data_texto] = registro
+        if anterior is None:
+            adicionados.append(data_texto)
+        elif registro != anterior:
+            alterados.append(data_texto)
+
+    removidos = [d for d in registros_anteriores if d not in registros]
+    alteracoes = {"adicionados": adicionados, "alterados": alterados, "removidos": removidos}
+    return registros, fingerprints, alteracoes
+
+
+def ler_registros_arquivo(caminho):
+    """Lê uma página salva em disco (ex.: arquivo .html arquivado)."""
+    return parse_registros_html(Path(caminho).read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    arquivos = [Path(a) for a in sys.argv[1:]] or [Path(__file__).parent / "fixtures" / "registros_mes.html"]
+    for arquivo in arquivos:
+        html = arquivo.read_text(encoding="utf-8")
+        inicio = time.perf_counter()
+        registros = parse_registros_html(html)
+        ms = (time.perf_counter() - inicio) * 1000
+        esperado = arquivo.with_suffix(".json")
+        if esperado.exists():
+            ok = json.loads(esperado.read_text(encoding="utf-8")) == registros
+            print(f"{'✅' if ok else '❌'} {arquivo.name}: {len(registros)} registros em {ms:.1f} ms "
+                  f"(esperado: {esperado.name})")
+        else:
+            print(f"✅ {arquivo.name}: {len(registros)} registros em {ms:.1f} ms")
+            print(json.dumps(registros, indent=2, ensure_ascii=False))
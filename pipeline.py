@@ -0,0 +1,107 @@
+# pipeline.py
+"""
+Fluxo PDF -> timesheet -> plano inteiro em memória.
+
+Antes cada etapa gravava um .xlsx que a seguinte relia com o openpyxl:
+emailtoexcel (report.pdf -> tabela_final_organizada.xlsx), excel_organizer
+(-> timesheet.xlsx) e gerar_plano (-> plano_para_preenchimento.json). Aqui os
+DataFrames passam direto de uma etapa para a outra; os arquivos viram saídas
+opcionais, gravadas numa thread à parte enquanto o fluxo segue:
+
+    saidas = {"tabela": "tabela_final_organizada.xlsx",
+              "timesheet": "timesheet.pkl",          # .pkl/.parquet/.feather: rápido
+              "plano": "plano_para_preenchimento.json"}
+
+Uso:
+    python pipeline.py report.pdf [registros_mensais.json]
+"""
+
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ETAPAS = ("tabela", "timesheet", "plano")
+SAIDAS_PADRAO = {
+    "tabela": "tabela_final_organizada.xlsx",
+    "timesheet": "timesheet.xlsx",
+    "plano": "plano_para_preenchimento.json",
+}
+
+
+def gravar_saida(dados, caminho):
+    """Grava um DataFrame (.xlsx, .csv, .pkl, .parquet, .feather) ou o plano (.json)."""
+    sufixo = Path(caminho).suffix.lower()
+    if sufixo == ".json":
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+    elif sufixo == ".pkl":
+        dados.to_pickle(caminho)
+    elif sufixo == ".parquet":
+        dados.to_parquet(caminho, index=False)  # requer pyarrow
+    elif sufixo == ".feather":
+        dados.to_feather(caminho)  # requer pyarrow
+    elif sufixo == ".csv":
+        dados.to_csv(caminho, index=False, encoding="utf-8-sig")
+    else:
+        dados.to_excel(caminho, index=False, engine="openpyxl")
+    print(f"💾 Saída gravada: {caminho}")
+    return caminho
+
+
+def executar_pipeline(pdf_path, registros, hoje=None, politica=None, saidas=None, processos=None,
+                      triagem=False, motor="iterativo"):
+    """
+    report.pdf + registros do PMóvel (dict de registros_mensais.json) -> plano.
+    saidas: {etapa: caminho} para as etapas que também devem virar arquivo
+    (ver ETAPAS); gravadas em segundo plano, o retorno espera todas terminarem.
+    Retorna {"tabela": DataFrame, "timesheet": DataFrame, "plano": dict}.
+    """
+    # imports aqui: camelot/pypdf só carregam quando o fluxo roda
+    import emailtoexcel
+    import excel_organizer
+    import gerar_plano
+
+    saidas = saidas or {}
+    desconhecidas = set(saidas) - set(ETAPAS)
+    if desconhecidas:
+        raise ValueError(f"Etapas desconhecidas em saidas: {sorted(desconhecidas)}")
+    hoje = hoje or datetime.today().date()
+    politica = politica or gerar_plano.POLITICA_PADRAO
+    processos = emailtoexcel.PROCESSOS if processos is None else processos
+
+    resultado = {}
+    with ThreadPoolExecutor(max_workers=1) as gravador:
+        pendentes = []
+
+        def entregar(etapa, dados):
+            resultado[etapa] = dados
+            if etapa in saidas:
+                pendentes.append(gravador.submit(gravar_saida, dados, saidas[etapa]))
+
+        tabela = emailtoexcel.extrair_dataframe(pdf_path, processos, triagem)
+        if tabela is None:
+            tabela = pd.DataFrame()
+        # mesmo índice que a releitura do .xlsx teria (orig_row conta a partir de 0)
+        entregar("tabela", tabela.reset_index(drop=True))
+
+        entregar("timesheet", excel_organizer.organizar_timesheet(resultado["tabela"], motor))
+        entregar("plano", gerar_plano.planejar(registros, resultado["timesheet"], hoje, politica))
+
+        for futuro in pendentes:
+            futuro.result()  # propaga erro de gravação
+    return resultado
+
+
+if __name__ == "__main__":
+    import gerar_plano
+
+    pdf = sys.argv[1] if len(sys.argv) > 1 else "report.pdf"
+    arq_registros = sys.argv[2] if len(sys.argv) > 2 else gerar_plano.ARQ_REGISTROS
+    with open(arq_registros, "r", encoding="utf-8") as f:
+        registros = json.load(f)
+    resultado = executar_pipeline(pdf, registros, saidas=SAIDAS_PADRAO)
+    print(f"✅ {len(resultado['timesheet'])} registros no timesheet, {len(resultado['plano'])} dias no plano")
@@ -0,0 +1,150 @@
+# pool_navegadores.py
+"""
+Pool de navegadores Chrome reaproveitáveis, compartilhado pelos módulos
+que usam Selenium (main.py, emailtoexcel.py).
+
+- Perfis: "headful" (janela maximizada, como o main.py) e "headless".
+- Entrega com context manager:  with pool_padrao().navegador("headless") as driver:
+- Entre um uso e outro limpa cookies, localStorage/sessionStorage, fecha
+  abas extras e volta para about:blank.
+- Recicla (quit + novo Chrome) após `max_usos` usos ou se o driver quebrar.
+
+O pool vive dentro de um processo: só reaproveita Chromes entre usos no
+mesmo interpretador (ex.: várias extrações seguidas do exportador_daily).
+Cada execução do main.py é um processo novo e começa com o pool vazio; os
+ociosos são fechados na saída (atexit). Não há compartilhamento entre
+execuções — para isso seria preciso reanexar a uma sessão do chromedriver
+que sobrevivesse ao processo, o que este módulo não faz.
+"""
+
+import atexit
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+
+def _opcoes_headful():
+    opts = Options()
+    opts.add_argument("--start-maximized")
+    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
+    opts.add_experimental_option("useAutomationExtension", False)
+    return opts
+
+
+def _opcoes_headless():
+    opts = Options()
+    opts.add_argument("--headless")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--window-size=1920,1080")
+    return opts
+
+
+PERFIS = {
+    "headful": _opcoes_headful,
+    "headless": _opcoes_headless,
+}
+
+
+class PoolNavegadores:
+    def __init__(self, max_usos=25, max_ociosos=2):
+        self.max_usos = max_usos
+        self.max_ociosos = max_ociosos
+        self._ociosos = {perfil: [] for perfil in PERFIS}
+        self._usos = {}
+        self._trava = threading.Lock()
+
+    def _criar(self, perfil):
+        driver = webdriver.Chrome(service=Service(), options=PERFIS[perfil]())
+        with self._trava:
+            self._usos[id(driver)] = 0
+        return driver
+
+    def _descartar(self, driver):
+        with self._trava:
+            self._usos.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _resetar(self, driver):
+        janelas = driver.window_handles
+        for janela in janelas[1:]:
+            driver.switch_to.window(janela)
+            driver.close()
+        driver.switch_to.window(janelas[0])
+        try:
+            driver.execute_script("localStorage.clear(); sessionStorage.clear();")
+        except WebDriverException:
+            pass  # páginas file:// / about:blank não têm storage
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def adquirir(self, perfil="headful"):
+        """Pega um Chrome ocioso do perfil (ou inicia um novo)."""
+        if perfil not in PERFIS:
+            raise ValueError(f"Perfil de navegador desconhecido: {perfil}")
+        with self._trava:
+            ociosos = self._ociosos[perfil]
+            driver = ociosos.pop() if ociosos else None
+        if driver is None:
+            driver = self._criar(perfil)
+        driver._perfil_pool = perfil
+        return driver
+
+    def devolver(self, driver, quebrado=False):
+        """Devolve o Chrome ao pool; recicla se quebrou ou atingiu max_usos."""
+        with self._trava:
+            usos = self._usos[id(driver)] = self._usos.get(id(driver), 0) + 1
+        if quebrado or usos >= self.max_usos:
+            self._descartar(driver)
+            return
+        try:
+            self._resetar(driver)
+        except WebDriverException:
+            self._descartar(driver)
+            return
+        with self._trava:
+            ociosos = self._ociosos[driver._perfil_pool]
+            if len(ociosos) < self.max_ociosos:
+                ociosos.append(driver)
+                return
+        self._descartar(driver)
+
+    @contextmanager
+    def navegador(self, perfil="headful"):
+        driver = self.adquirir(perfil)
+        try:
+            yield driver
+        except WebDriverException:
+            self.devolver(driver, quebrado=True)
+            raise
+        except BaseException:
+            self.devolver(driver)
+            raise
+        else:
+            self.devolver(driver)
+
+    def fechar_todos(self):
+        with self._trava:
+            drivers = [d for lista in self._ociosos.values() for d in lista]
+            for lista in self._ociosos.values():
+                lista.clear()
+        for driver in drivers:
+            self._descartar(driver)
+
+
+_pool = None
+
+
+def pool_padrao():
+    """Pool único do processo (não sobrevive entre execuções); os Chromes ociosos são fechados na saída."""
+    global _pool
+    if _pool is None:
+        _pool = PoolNavegadores()
+        atexit.register(_pool.fechar_todos)
+    return _pool
@@ -1,11 +1,20 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (TimeoutException, NoSuchElementException, StaleElementReferenceException,
+                                        WebDriverException)
 from datetime import datetime
 import json
 import time
-import random
+
+from diario_preenchimento import (ARQ_DIARIO, CONFIRMADO, ENVIADO, INCERTO, PENDENTE, DiarioPreenchimento,
+                                  escopo_do_plano)
+from navegacao_pmovel import XPATH_LINHAS, selecionar_mes_atual
+from parser_registros import parse_registros_html
+from prontidao import aguardar_estavel
+from ritmo import criar_ritmo
+
+OBSERVACAO_PADRAO = "Trabalho"
 
 def fechar_modal_se_existir(browser, wait):
     try:
@@ -18,80 +27,292 @@ def fechar_modal_se_existir(browser, wait):
     except NoSuchElementException:
         pass
 
-def preencher_modal(browser, plano_json_path="plano_para_preenchimento.json"):
-    wait = WebDriverWait(browser, 10)
+# Monta data -> botão "+" de todas as linhas numa única chamada e instala um
+# MutationObserver que marca window.__pmTabelaMudou quando linhas são trocadas.
+JS_INDICE_LINHAS = """
+const indice = {};
+const padrao = /\\d{2}\\/\\d{2}\\/\\d{4}/;
+for (const tr of document.querySelectorAll("tr")) {
+    const botao = tr.querySelector("div[onclick*='addRegister']");
+    if (!botao) { continue; }
+    for (const span of tr.querySelectorAll(":scope > td > span")) {
+        const m = (span.textContent || "").match(padrao);
+        if (m && !(m[0] in indice)) { indice[m[0]] = botao; break; }
+    }
+}
+if (window.__pmObservador) { window.__pmObservador.disconnect(); }
+window.__pmTabelaMudou = false;
+window.__pmObservador = new MutationObserver(() => { window.__pmTabelaMudou = true; });
+const algum = Object.values(indice)[0];
+const tabela = algum ? algum.closest("table") : null;
+if (tabela) {
+    window.__pmObservador.observe(tabela, {childList: true});
+    for (const tbody of tabela.tBodies) { window.__pmObservador.observe(tbody, {childList: true}); }
+}
+return indice;
+"""
 
-    with open(plano_json_path, "r", encoding="utf-8") as f:
-        plano = json.load(f)
+# Rola até o botão e informa, na mesma chamada, se a tabela mudou desde o índice.
+JS_ROLAR_E_VERIFICAR = """
+arguments[0].scrollIntoView({block: 'center'});
+return window.__pmTabelaMudou !== false;
+"""
+
+
+class IndiceLinhas:
+    """
+    Índice data -> botão "+" da tabela de registros, montado uma vez por
+    carga de página. Só é reconstruído quando o MutationObserver indica que
+    as linhas foram trocadas, quando um elemento fica stale ou quando falta
+    uma data (o índice pode ter sido montado com a tabela ainda carregando).
+    """
+
+    def __init__(self, browser):
+        self.browser = browser
+        self._botoes = None
+        self._ausentes = set()  # datas que faltavam mesmo com a tabela assentada
+        self.reconstrucoes = 0
+
+    def reconstruir(self):
+        self._botoes = self.browser.execute_script(JS_INDICE_LINHAS) or {}
+        self._ausentes = set()
+        self.reconstrucoes += 1
+
+    def invalidar(self):
+        self._botoes = None
+
+    def _buscar(self, data_str):
+        if self._botoes is None:
+            self.reconstruir()
+        botao = self._botoes.get(data_str)
+        if botao is None and data_str not in self._ausentes:
+            # espera a tabela assentar e remonta uma vez antes de desistir da data
+            try:
+                aguardar_estavel(self.browser, f"linha de {data_str}", xpath_linhas=XPATH_LINHAS)
+            except WebDriverException:
+                pass  # remonta com o que houver
+            self.reconstruir()
+            botao = self._botoes.get(data_str)
+            if botao is None:
+                self._ausentes.add(data_str)
+        if botao is None:
+            raise TimeoutException(f"Linha de {data_str} não encontrada na tabela")
+        return botao
+
+    def botao(self, data_str):
+        """Botão "+" da data, já rolado para a tela; reconstrói o índice se necessário."""
+        for tentativa in range(2):
+            try:
+                botao = self._buscar(data_str)
+                mudou = self.browser.execute_script(JS_ROLAR_E_VERIFICAR, botao)
+                if not mudou or tentativa == 1:
+                    return botao
+            except StaleElementReferenceException:
+                if tentativa == 1:
+                    raise
+            self.invalidar()
+        return botao
+
+
+def preencher_horario_modal(browser, wait, data_str, horario, diario=None, indice=None):
+    """
+    Lança um horário pelo modal: abre o "+", preenche, salva e espera fechar.
+    Retorna a latência (s) entre o clique em salvar e o modal fechar.
+    indice: IndiceLinhas opcional; sem ele a linha é localizada por XPath.
+    """
+    fechar_modal_se_existir(browser, wait)
+
+    if indice is not None:
+        botao_add = wait.until(EC.element_to_be_clickable(indice.botao(data_str)))
+    else:
+        # localiza a linha do dia
+        linha = wait.until(
+            EC.presence_of_element_located(
+                (By.XPATH, f"//tr[td/span[contains(text(), '{data_str}')]]")
+            )
+        )
+
+        # clica no botão "+" para abrir modal
+        botao_add = wait.until(
+            EC.element_to_be_clickable(
+                linha.find_element(By.XPATH, ".//div[contains(@onclick, 'addRegister')]")
+            )
+        )
+        browser.execute_script("arguments[0].scrollIntoView({block: 'center'});", botao_add)
+    botao_add.click()
+
+    # espera modal abrir
+    modal = wait.until(
+        EC.visibility_of_element_located((By.ID, "modal_add_register"))
+    )
+    print(f"🔹 Modal aberto para {data_str}, horário {horario}")
+
+    # preenche horário
+    input_horario = modal.find_element(By.ID, "time_add_register")
+    browser.execute_script(
+        "arguments[0].value = arguments[1]; arguments[0].dispatchEvent(new Event('input'));",
+        input_horario, horario
+    )
+    print(f"   ⏰ Horário preenchido: {horario}")
+
+    # preenche observação
+    input_obs = modal.find_element(By.ID, "obs_add_register")
+    input_obs.clear()
+    input_obs.send_keys(OBSERVACAO_PADRAO)
+    print(f"   📝 Observação preenchida: {OBSERVACAO_PADRAO}")
+
+    # --- Clica em fechar (por enquanto, não salva) ---
+    #btn_fechar = modal.find_element(By.CSS_SELECTOR, "button[data-dismiss='modal']")
+    #btn_fechar.click()
+    #wait.until(EC.invisibility_of_element(modal))
+    #print(f"⚠️ Modal fechado para {data_str}, horário {horario}")
+
+    # --- Salva os horarios
+    btn_save = modal.find_element(By.ID, "modal_add_register_save")
+    if diario:
+        diario.registrar(data_str, horario, ENVIADO)
+    inicio_save = time.perf_counter()
+    btn_save.click()
+    wait.until(EC.invisibility_of_element(modal))
+    latencia = time.perf_counter() - inicio_save
+    if diario:
+        diario.registrar(data_str, horario, CONFIRMADO)
+    print(f"⚠️ Horario Salvo para {data_str}, horário {horario}")
+    return latencia
 
-    dias = sorted(plano.keys(), key=lambda x: datetime.strptime(x, "%d/%m/%Y"))
 
-    for data_str in dias:
+def listar_horarios_pendentes(plano, dias=None):
+    """
+    Lista (data, horário) a lançar, em ordem cronológica, só dos dias vazios.
+    dias: se informado, só essas datas (ex.: plano_dias_recalculados.json).
+    """
+    pendentes = []
+    datas = plano.keys() if dias is None else set(plano) & set(dias)
+    datas = sorted(datas, key=lambda x: datetime.strptime(x, "%d/%m/%Y"))
+
+    for data_str in datas:
         info = plano[data_str]
         if info.get("status") != "vazio":
             continue  # só preenche dias vazios
 
         horarios = [info.get("in_1"), info.get("out_1"), info.get("in_2"), info.get("out_2")]
         horarios = [h for h in horarios if h]  # remove None ou vazio
+        pendentes.extend((data_str, horario) for horario in horarios)
 
-        for horario in horarios:
-            try:
-                fechar_modal_se_existir(browser, wait)
-
-                # localiza a linha do dia
-                linha = wait.until(
-                    EC.presence_of_element_located(
-                        (By.XPATH, f"//tr[td/span[contains(text(), '{data_str}')]]")
-                    )
-                )
-
-                # clica no botão "+" para abrir modal
-                botao_add = wait.until(
-                    EC.element_to_be_clickable(
-                        linha.find_element(By.XPATH, ".//div[contains(@onclick, 'addRegister')]")
-                    )
-                )
-                browser.execute_script("arguments[0].scrollIntoView({block: 'center'});", botao_add)
-                botao_add.click()
-
-                # espera modal abrir
-                modal = wait.until(
-                    EC.visibility_of_element_located((By.ID, "modal_add_register"))
-                )
-                print(f"🔹 Modal aberto para {data_str}, horário {horario}")
-
-                # preenche horário
-                input_horario = modal.find_element(By.ID, "time_add_register")
-                browser.execute_script(
-                    "arguments[0].value = arguments[1]; arguments[0].dispatchEvent(new Event('input'));",
-                    input_horario, horario
-                )
-                print(f"   ⏰ Horário preenchido: {horario}")
-
-                # preenche observação
-                input_obs = modal.find_element(By.ID, "obs_add_register")
-                input_obs.clear()
-                input_obs.send_keys("Trabalho")
-                print(f"   📝 Observação preenchida: Trabalho")
-
-                # --- Clica em fechar (por enquanto, não salva) ---
-                #btn_fechar = modal.find_element(By.CSS_SELECTOR, "button[data-dismiss='modal']")
-                #btn_fechar.click()
-                #wait.until(EC.invisibility_of_element(modal))
-                #print(f"⚠️ Modal fechado para {data_str}, horário {horario}")
-
-                # --- Salva os horarios
-                btn_save = modal.find_element(By.ID, "modal_add_register_save")
-                btn_save.click()
-                wait.until(EC.invisibility_of_element(modal))
-                print(f"⚠️ Horario Salvo para {data_str}, horário {horario}")
-
-                # --- Delay aleatório para simular comportamento humano ---
-                time.sleep(random.uniform(1, 3))
-
-            except TimeoutException:
-                print(f"❌ Elemento não encontrado para {data_str} / horário {horario}")
-            except Exception as e:
-                print(f"❌ Erro ao preencher modal para {data_str} / horário {horario}: {e}")
+    return pendentes
+
+
+def horarios_ja_lancados(browser, itens):
+    """
+    Confere (data, horário) na tabela da página atual. Retorna (lancados,
+    sem_linha): os que já aparecem e os que não dá para conferir porque a
+    linha do dia (ou a tabela inteira) não está na página. Só o que sobra dos
+    dois é seguro relançar.
+    """
+    try:
+        registros = parse_registros_html(browser.page_source)
+    except ValueError:
+        return set(), set(itens)  # tabela ainda não renderizada
+    lancados, sem_linha = set(), set()
+    for data_str, horario in itens:
+        info = registros.get(data_str)
+        if info is None:
+            sem_linha.add((data_str, horario))
+        elif horario in [info.get(f"{lado}_{n}") for lado in ("in", "out") for n in range(1, 5)]:
+            lancados.add((data_str, horario))
+    return lancados, sem_linha
+
+
+def recarregar_tabela(browser):
+    """Recarrega a página e espera a tabela do mês atual assentar (filtro reaplicado)."""
+    browser.refresh()
+    try:
+        aguardar_estavel(browser, "tabela recarregada", xpath_linhas=XPATH_LINHAS)
+    except WebDriverException as e:
+        print("⚠️ Tabela não assentou após recarregar:", e.msg if hasattr(e, "msg") else e)
+    selecionar_mes_atual(browser)
+
+
+def conferir_incertos(browser, diario, incertos):
+    """
+    Marca como confirmados os incertos que já estão na página e como incertos
+    no diário os que não dá para conferir. Retorna os que é seguro relançar.
+    """
+    lancados, sem_linha = horarios_ja_lancados(browser, incertos)
+    for data_str, horario in lancados:
+        diario.registrar(data_str, horario, CONFIRMADO)
+    for data_str, horario in sem_linha:
+        diario.registrar(data_str, horario, INCERTO)
+    print(f"🔎 {len(incertos)} horários sem confirmação: {len(lancados)} já estavam na página, "
+          f"{len(sem_linha)} sem linha para conferir (ficam incertos, não são relançados)")
+    return [i for i in incertos if i not in lancados and i not in sem_linha]
+
+
+def _preencher_via_modal(browser, wait, data_str, horario, ritmo, diario, indice):
+    try:
+        diario.registrar(data_str, horario, PENDENTE)
+        latencia = preencher_horario_modal(browser, wait, data_str, horario, diario, indice)
+        ritmo.registrar(latencia)
+    except TimeoutException:
+        ritmo.registrar(timeout=True)
+        print(f"❌ Elemento não encontrado para {data_str} / horário {horario}")
+    except Exception as e:
+        ritmo.registrar(erro=True)
+        print(f"❌ Erro ao preencher modal para {data_str} / horário {horario}: {e}")
+    finally:
+        # --- Pausa entre lançamentos, ajustada pelo ritmo (também após erro: é aí que o recuo vale) ---
+        ritmo.aguardar()
+
+
+def preencher_modal(browser, plano_json_path="plano_para_preenchimento.json", backend="modal", ritmo=None,
+                    diario_path=ARQ_DIARIO, dias=None):
+    """
+    backend="modal": lança cada horário pelo modal da página (padrão).
+    backend="http": envia os horários direto ao endpoint do modal, em lotes,
+    reaproveitando os cookies do Selenium; o que o endpoint recusar é
+    relançado pelo modal, e o que ficar sem resposta conclusiva (timeout,
+    queda) é antes conferido na página, para não lançar em dobro.
+    ritmo: controle de pausa entre lançamentos (ver ritmo.py); padrão RitmoAIMD.
+    diario_path: diário de retomada (ver diario_preenchimento.py); horários já
+    confirmados numa execução anterior do mesmo plano são pulados. Quando tudo
+    fica confirmado, o diário é compactado.
+    dias: lista de datas a considerar (ex.: as recalculadas por gerar_plano);
+    None preenche o plano inteiro.
+    """
+    if ritmo is None:
+        ritmo = criar_ritmo()
+    wait = WebDriverWait(browser, 10)
+
+    with open(plano_json_path, "r", encoding="utf-8") as f:
+        plano = json.load(f)
+
+    with DiarioPreenchimento(diario_path, escopo=escopo_do_plano(plano_json_path)) as diario:
+        itens = listar_horarios_pendentes(plano, dias)
+        pendentes, incertos, confirmados = diario.separar(itens)
+        if confirmados or incertos:
+            print(f"↩️ Retomando: {confirmados} horários já confirmados, {len(incertos)} a reverificar")
+        if incertos:
+            pendentes = conferir_incertos(browser, diario, incertos) + pendentes
+            pendentes.sort(key=lambda x: (datetime.strptime(x[0], "%d/%m/%Y"), x[1]))
+
+        if backend == "http":
+            from envio_http import enviar_pendentes_http
+            recusados, incertos = enviar_pendentes_http(browser, pendentes, diario=diario)
+            if recusados or incertos:
+                recarregar_tabela(browser)
+            if incertos:
+                # o servidor pode ter gravado antes de a conexão cair: confere antes de relançar
+                recusados += conferir_incertos(browser, diario, incertos)
+            if recusados:
+                print(f"⚠️ {len(recusados)} horários não lançados pelo endpoint; relançando pelo modal")
+            pendentes = sorted(recusados, key=lambda x: (datetime.strptime(x[0], "%d/%m/%Y"), x[1]))
+
+        indice = IndiceLinhas(browser)
+        for data_str, horario in pendentes:
+            _preencher_via_modal(browser, wait, data_str, horario, ritmo, diario, indice)
+
+        if diario.completo(itens):
+            diario.compactar()
 
+    ritmo.imprimir_estatisticas()
     print("🎉 Todos os registros faltantes preparados (modais preenchidos e fechados)!")
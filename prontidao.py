@@ -0,0 +1,143 @@
+# prontidao.py
+"""
+Detecção de "página pronta" orientada a eventos, no lugar de WebDriverWait
+com timeouts fixos.
+
+Um gancho instalado na página conta as requisições XHR/fetch em andamento e
+marca o instante da última mutação do DOM (MutationObserver). As esperas
+rodam dentro da página com execute_async_script e respondem com um único
+sinal:
+
+- aguardar_elemento: o XPath ficou visível (ou a página assentou sem ele -> None)
+- aguardar_estavel: nenhuma requisição pendente e DOM quieto por QUIETO_MS
+
+LIMITE_S é só o teto de segurança do script; o normal é responder assim que
+a página assenta. Cada espera registra o tempo até ficar pronta.
+"""
+
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
+
+QUIETO_MS = 400
+LIMITE_S = 30
+TENTATIVAS_NAVEGACAO = 3  # a página pode recarregar no meio da espera
+
+JS_GANCHOS = """
+if (!window.__pmPronto) {
+    const p = window.__pmPronto = {pendentes: 0, ultima: performance.now()};
+    const marcar = () => { p.ultima = performance.now(); };
+    const terminou = () => { p.pendentes = Math.max(0, p.pendentes - 1); marcar(); };
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        p.pendentes++; marcar();
+        this.addEventListener("loadend", terminou);
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        const fetchOriginal = window.fetch;
+        window.fetch = function () {
+            p.pendentes++; marcar();
+            return fetchOriginal.apply(this, arguments).finally(terminou);
+        };
+    }
+    new MutationObserver(marcar).observe(document.documentElement,
+        {childList: true, subtree: true, attributes: true, characterData: true});
+}
+const p = window.__pmPronto;
+const quieto = (ms) => document.readyState === "complete" && p.pendentes === 0 && performance.now() - p.ultima >= ms;
+"""
+
+JS_AGUARDAR_ELEMENTO = JS_GANCHOS + """
+const [xpath, quietoMs, desistirQuieto] = arguments;
+const fim = arguments[arguments.length - 1];
+const t0 = performance.now();
+const achar = () => {
+    const el = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return el && el.getClientRects().length > 0 && !el.disabled ? el : null;
+};
+(function checar() {
+    const el = achar();
+    if (el) { return fim({elemento: el, ms: performance.now() - t0}); }
+    if (desistirQuieto && quieto(quietoMs) && performance.now() - t0 >= quietoMs) {
+        return fim({elemento: null, ms: performance.now() - t0});
+    }
+    setTimeout(checar, 50);
+})();
+"""
+
+JS_AGUARDAR_ESTAVEL = JS_GANCHOS + """
+const [quietoMs, marco, xpathLinhas] = arguments;
+const fim = arguments[arguments.length - 1];
+const t0 = performance.now();
+const linhas = () => xpathLinhas ? document.evaluate("count(" + xpathLinhas + ")", document, null,
+    XPathResult.NUMBER_TYPE, null).numberValue : null;
+(function checar() {
+    // se houve um marco (ex.: clique), exige que algo tenha acontecido depois dele,
+    // a não ser que a página continue parada por mais que o dobro da janela
+    const reagiu = marco === null || p.ultima > marco || performance.now() - t0 >= 2 * quietoMs;
+    if (reagiu && quieto(quietoMs)) { return fim({ms: performance.now() - t0, linhas: linhas()}); }
+    setTimeout(checar, 50);
+})();
+"""
+
+JS_MARCO = JS_GANCHOS + "return performance.now();"
+
+
+def _executar_async(browser, script, *args, limite_s=LIMITE_S):
+    """Roda o script assíncrono, repetindo se a página navegar no meio."""
+    browser.set_script_timeout(limite_s)
+    for tentativa in range(TENTATIVAS_NAVEGACAO):
+        try:
+            return browser.execute_async_script(script, *args)
+        except TimeoutException:
+            raise
+        except (JavascriptException, WebDriverException):
+            if tentativa == TENTATIVAS_NAVEGACAO - 1:
+                raise
+            time.sleep(0.1)  # documento trocou; reinstala os ganchos no novo
+
+
+def marcar(browser):
+    """Instala os ganchos e devolve o instante atual da página (usar antes de um clique)."""
+    return browser.execute_script(JS_MARCO)
+
+
+def aguardar_elemento(browser, xpath, nome=None, quieto_ms=QUIETO_MS, limite_s=LIMITE_S, obrigatorio=True,
+                      desistir_quieto=True):
+    """
+    Espera o XPath ficar visível. Se a página assentar sem ele, levanta
+    TimeoutException (obrigatorio=True) ou retorna None.
+    desistir_quieto=False: espera até limite_s mesmo com a página parada
+    (ex.: logo após um submit, quando o documento antigo ainda está quieto).
+    """
+    r = _executar_async(browser, JS_AGUARDAR_ELEMENTO, xpath, quieto_ms, desistir_quieto, limite_s=limite_s)
+    _log(nome or xpath, r["ms"], "" if r["elemento"] is not None else " (ausente)")
+    if r["elemento"] is None and obrigatorio:
+        raise TimeoutException(f"Elemento não apareceu antes da página assentar: {xpath}")
+    return r["elemento"]
+
+
+def aguardar_estavel(browser, nome="página estável", marco=None, xpath_linhas=None,
+                     quieto_ms=QUIETO_MS, limite_s=LIMITE_S):
+    """
+    Espera não haver XHR/fetch pendente e o DOM ficar quieto por quieto_ms.
+    marco: valor de marcar() antes da ação; xpath_linhas: conta linhas no fim.
+    Retorna o número de linhas (ou None).
+    """
+    r = _executar_async(browser, JS_AGUARDAR_ESTAVEL, quieto_ms, marco, xpath_linhas, limite_s=limite_s)
+    _log(nome, r["ms"], f" ({int(r['linhas'])} linhas)" if r["linhas"] is not None else "")
+    return r["linhas"]
+
+
+def _log(nome, ms, extra=""):
+    print(f"⏱️ {nome}: pronto em {ms:.0f} ms{extra}")
+
+
+@contextmanager
+def etapa(nome):
+    """Mede uma etapa inteira da navegação (inclui cliques e esperas)."""
+    inicio = time.perf_counter()
+    yield
+    print(f"⏱️ Etapa '{nome}': {(time.perf_counter() - inicio) * 1000:.0f} ms")
@@ -0,0 +1,112 @@
+# ritmo.py
+"""
+Controle de ritmo do preenchimento (pausa entre um lançamento e outro).
+
+- RitmoFixo: comportamento antigo, pausa aleatória entre min e max segundos.
+- RitmoAIMD: pausa adaptativa. Cada lançamento rápido (latência salvar ->
+  modal fechado abaixo do alvo) reduz a pausa em `passo` segundos; lançamento
+  lento aumenta em `passo`; erro/timeout multiplica a pausa por
+  `fator_recuo`. Enquanto a taxa de erro da janela recente passar de
+  `taxa_erro_max`, sucessos não reduzem a pausa (só a mantêm). Sempre entre
+  atraso_min e atraso_max.
+
+Os dois expõem registrar(latencia, erro, timeout), aguardar() e estatisticas().
+"""
+
+import random
+import time
+from collections import deque
+
+
+class RitmoFixo:
+    def __init__(self, minimo=1.0, maximo=3.0):
+        self.minimo = minimo
+        self.maximo = maximo
+        self._latencias = []
+        self._erros = 0
+        self._timeouts = 0
+        self._tempo_espera = 0.0
+
+    def proximo_atraso(self):
+        return random.uniform(self.minimo, self.maximo)
+
+    def registrar(self, latencia=None, erro=False, timeout=False):
+        if timeout:
+            self._timeouts += 1
+        elif erro:
+            self._erros += 1
+        if latencia is not None:
+            self._latencias.append(latencia)
+
+    def aguardar(self):
+        atraso = self.proximo_atraso()
+        time.sleep(atraso)
+        self._tempo_espera += atraso
+        return atraso
+
+    def estatisticas(self):
+        lat = sorted(self._latencias)
+        return {
+            "lancamentos": len(lat) + self._erros + self._timeouts,
+            "sucessos": len(lat),
+            "erros": self._erros,
+            "timeouts": self._timeouts,
+            "latencia_media": round(sum(lat) / len(lat), 3) if lat else None,
+            "latencia_p95": round(lat[int(0.95 * (len(lat) - 1))], 3) if lat else None,
+            "latencia_max": round(lat[-1], 3) if lat else None,
+            "tempo_em_pausa": round(self._tempo_espera, 2),
+        }
+
+    def imprimir_estatisticas(self):
+        e = self.estatisticas()
+        print(
+            f"📊 Ritmo: {e['sucessos']}/{e['lancamentos']} lançamentos ok, "
+            f"{e['erros']} erros, {e['timeouts']} timeouts, "
+            f"latência média {e['latencia_media']}s (p95 {e['latencia_p95']}s), "
+            f"{e['tempo_em_pausa']}s em pausa"
+        )
+
+
+class RitmoAIMD(RitmoFixo):
+    def __init__(self, atraso_inicial=1.0, atraso_min=0.2, atraso_max=15.0, passo=0.1,
+                 fator_recuo=2.0, latencia_alvo=1.5, janela=20, taxa_erro_max=0.2):
+        super().__init__(atraso_min, atraso_max)
+        self.atraso = atraso_inicial
+        self.passo = passo
+        self.fator_recuo = fator_recuo
+        self.latencia_alvo = latencia_alvo
+        self.taxa_erro_max = taxa_erro_max
+        self._recentes = deque(maxlen=janela)  # True = falhou
+        self._recuos = 0
+
+    def proximo_atraso(self):
+        return self.atraso
+
+    def registrar(self, latencia=None, erro=False, timeout=False):
+        super().registrar(latencia, erro, timeout)
+        falhou = erro or timeout
+        self._recentes.append(falhou)
+        taxa_erro = sum(self._recentes) / len(self._recentes)
+
+        if falhou:
+            self.atraso = min(self.maximo, max(self.atraso, self.passo) * self.fator_recuo)
+            self._recuos += 1
+        elif latencia is not None and latencia > self.latencia_alvo:
+            self.atraso = min(self.maximo, self.atraso + self.passo)
+        elif taxa_erro <= self.taxa_erro_max:
+            self.atraso = max(self.minimo, self.atraso - self.passo)
+        # sucesso rápido com muitas falhas recentes: mantém a pausa
+
+    def estatisticas(self):
+        e = super().estatisticas()
+        e.update({"atraso_final": round(self.atraso, 3), "recuos": self._recuos})
+        return e
+
+
+def criar_ritmo(tipo="aimd", **limites):
+    """Fábrica usada pelo preenchimento: tipo "aimd" (padrão) ou "fixo"."""
+    if tipo == "fixo":
+        return RitmoFixo(**limites)
+    if tipo == "aimd":
+        return RitmoAIMD(**limites)
+    raise ValueError(f"Tipo de ritmo desconhecido: {tipo}")
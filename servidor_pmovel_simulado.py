@@ -0,0 +1,100 @@
+# servidor_pmovel_simulado.py
+"""
+Servidor local que imita o endpoint de lançamento de horários do PMóvel,
+para testar o backend HTTP (envio_http) sem rede e sem navegador.
+
+- POST /registros/add com os campos de data, hora e observação
+- exige o cookie de sessão e o header X-CSRF-TOKEN
+- recusa horário/data inválidos e horário repetido no mesmo dia (422)
+- servidor.atraso_resposta: segundos de espera depois de gravar e antes de
+  responder (simula o timeout do cliente com o horário já gravado)
+
+Uso:
+    python servidor_pmovel_simulado.py   # sobe o servidor e faz um envio de exemplo
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from envio_http import CAMPO_DATA, CAMPO_HORA, CAMPO_OBS
+
+COOKIE_SESSAO = "pmovel_session"
+CSRF_TOKEN = "token-simulado"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # mantém a conexão aberta (keep-alive)
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        try:
+            self.wfile.write(dados)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # cliente desistiu (timeout) antes da resposta
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        campos = {k: v[0] for k, v in parse_qs(self.rfile.read(tamanho).decode("utf-8")).items()}
+
+        if self.path != "/registros/add":
+            return self._responder(404, {"success": False, "message": "not found"})
+        if f"{COOKIE_SESSAO}=" not in self.headers.get("Cookie", ""):
+            return self._responder(401, {"success": False, "message": "sessão expirada"})
+        if self.headers.get("X-CSRF-TOKEN") != CSRF_TOKEN:
+            return self._responder(419, {"success": False, "message": "CSRF inválido"})
+
+        data_str = campos.get(CAMPO_DATA, "")
+        horario = campos.get(CAMPO_HORA, "")
+        if not re.fullmatch(r"\d{2}/\d{2}/\d{4}", data_str) or not re.fullmatch(r"([01]\d|2[0-3]):[0-5]\d", horario):
+            return self._responder(422, {"success": False, "message": "data ou horário inválido"})
+
+        with self.server.trava:
+            dia = self.server.registros.setdefault(data_str, [])
+            if horario in dia:
+                return self._responder(422, {"success": False, "message": "horário já registrado"})
+            dia.append(horario)
+        time.sleep(self.server.atraso_resposta)
+        self._responder(200, {"success": True, "obs": campos.get(CAMPO_OBS)})
+
+
+def iniciar_servidor_simulado(porta=0):
+    """Sobe o servidor numa thread. Retorna (servidor, url_add_register)."""
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), _Handler)
+    servidor.registros = {}
+    servidor.trava = threading.Lock()
+    servidor.atraso_resposta = 0
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    host, porta = servidor.server_address
+    return servidor, f"http://{host}:{porta}/registros/add"
+
+
+if __name__ == "__main__":
+    from envio_http import criar_sessao, enviar_pendentes_http
+
+    servidor, url = iniciar_servidor_simulado()
+    print("Servidor simulado em", url)
+
+    sessao = criar_sessao(
+        [{"name": COOKIE_SESSAO, "value": "abc", "domain": "127.0.0.1", "path": "/"}],
+        csrf_token=CSRF_TOKEN,
+    )
+    pendentes = [
+        ("01/10/2026", "07:30"), ("01/10/2026", "16:54"),
+        ("02/10/2026", "07:30"), ("02/10/2026", "25:00"),
+    ]
+    recusados, incertos = enviar_pendentes_http(None, pendentes, url=url, sessao=sessao)
+    print("Recusados (iriam para o modal):", recusados)
+    print("Incertos (conferidos na página):", incertos)
+    print("Registrados no servidor:", servidor.registros)
+    servidor.shutdown()
@@ -0,0 +1,120 @@
+# sessao_cache.py
+"""
+Cache da sessão autenticada do PMóvel entre execuções do main.py.
+
+Guarda cookies, localStorage e a URL da página de Registros num arquivo
+criptografado (Fernet). A chave vem de PMOVEL_SESSION_KEY (chave Fernet) ou,
+se ausente, é derivada de PMOVEL_PASS com PBKDF2 e um salt salvo junto.
+
+Na próxima execução, restaurar_sessao injeta os cookies/localStorage, abre
+direto a página de Registros e confere se a sessão ainda vale (sem
+redirecionar para o formulário de login). Se não valer, o cache é apagado e
+o main.py segue pelo login normal.
+"""
+
+import base64
+import json
+import os
+import time
+from pathlib import Path
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from selenium.webdriver.common.by import By
+
+URL_BASE = "https://www.pmovel.com.br/"
+ARQ_SESSAO = ".sessao_pmovel.bin"
+VALIDADE_MAXIMA = 12 * 3600  # segundos; além disso nem tenta restaurar
+
+
+def _fernet(salt, senha=None):
+    chave = os.getenv("PMOVEL_SESSION_KEY")
+    if chave:
+        return Fernet(chave.encode())
+    senha = senha or os.getenv("PMOVEL_PASS")
+    if not senha:
+        raise RuntimeError("Defina PMOVEL_SESSION_KEY ou PMOVEL_PASS para cifrar o cache de sessão")
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=200_000)
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(senha.encode())))
+
+
+def salvar_sessao(browser, url_registros, caminho=ARQ_SESSAO, senha=None):
+    """
+    Salva cookies, localStorage e a URL de Registros, cifrados em disco.
+    senha: usada para derivar a chave quando não há PMOVEL_SESSION_KEY
+    (padrão: PMOVEL_PASS).
+    """
+    dados = {
+        "criado_em": time.time(),
+        "url_registros": url_registros,
+        "cookies": browser.get_cookies(),
+        "local_storage": browser.execute_script(
+            "const d = {}; for (let i = 0; i < localStorage.length; i++) {"
+            " const k = localStorage.key(i); d[k] = localStorage.getItem(k); } return d;"
+        ),
+    }
+    salt = os.urandom(16)
+    try:
+        token = _fernet(salt, senha).encrypt(json.dumps(dados).encode("utf-8"))
+    except RuntimeError as e:
+        print("⚠️ Sessão não salva:", e)
+        return
+    Path(caminho).write_bytes(salt + token)
+    try:
+        os.chmod(caminho, 0o600)
+    except OSError:
+        pass
+    print("💾 Sessão salva para a próxima execução")
+
+
+def _carregar(caminho, senha=None):
+    bruto = Path(caminho).read_bytes()
+    salt, token = bruto[:16], bruto[16:]
+    return json.loads(_fernet(salt, senha).decrypt(token, ttl=VALIDADE_MAXIMA))
+
+
+def sessao_valida(browser):
+    """Checagem barata: a página atual não é o formulário de login."""
+    return not browser.find_elements(By.NAME, "password")
+
+
+def restaurar_sessao(browser, caminho=ARQ_SESSAO, senha=None):
+    """
+    Tenta reaproveitar a sessão salva. Se der certo, o navegador termina na
+    página de Registros e retorna True; caso contrário retorna False.
+    """
+    if not Path(caminho).exists():
+        return False
+    try:
+        dados = _carregar(caminho, senha)
+    except (InvalidToken, ValueError, RuntimeError) as e:
+        print("⚠️ Cache de sessão inválido ou expirado:", type(e).__name__)
+        Path(caminho).unlink(missing_ok=True)
+        return False
+
+    # cookies só podem ser definidos estando no domínio
+    browser.get(URL_BASE)
+    for cookie in dados["cookies"]:
+        cookie = {k: v for k, v in cookie.items() if k != "sameSite"}
+        if "expiry" in cookie:
+            if cookie["expiry"] < time.time():
+                continue
+            cookie["expiry"] = int(cookie["expiry"])
+        try:
+            browser.add_cookie(cookie)
+        except Exception:
+            continue
+    browser.execute_script(
+        "for (const [k, v] of Object.entries(arguments[0])) { localStorage.setItem(k, v); }",
+        dados.get("local_storage") or {},
+    )
+
+    browser.get(dados["url_registros"])
+    if sessao_valida(browser):
+        print("✅ Sessão restaurada do cache; login pulado")
+        return True
+
+    print("⚠️ Sessão salva expirou; fazendo login")
+    Path(caminho).unlink(missing_ok=True)
+    return False
@@ -0,0 +1,134 @@
+# tabela_email.py
+"""
+Extração da tabela do email do Salesforce direto do HTML (lxml), sem abrir
+Chrome. Mesma regra do caminho Selenium de exportador_daily:
+
+- tabelas em ordem de documento; a primeira com dados vence
+- linha = <tr>, células = th/td, texto como o navegador mostraria
+  (entidades decodificadas, espaços colapsados, <br> vira quebra de linha,
+  nada de elementos escondidos), células vazias descartadas
+
+Os emails do Salesforce embrulham a tabela do relatório em tabelas de layout
+aninhadas. O Selenium pegava a mais externa e achatava tudo nela; aqui só
+contam as tabelas "folha" (sem outra tabela dentro), que é onde estão os
+dados. Numa tabela sem aninhamento o resultado é o mesmo do Selenium.
+
+Uso (confere e mede nos fixtures):
+    python tabela_email.py [email.html ...]
+"""
+
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import lxml.etree
+import lxml.html
+
+TAGS_INVISIVEIS = {"head", "script", "style", "noscript", "template", "title", "meta", "link"}
+TAGS_BLOCO = {"address", "article", "aside", "blockquote", "div", "dl", "dt", "dd", "fieldset", "figure",
+              "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav",
+              "ol", "p", "pre", "section", "table", "tr", "ul"}
+_escondido_re = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+_espacos_re = re.compile(r"[^\S\n]+")
+
+
+def _escondido(el):
+    return el.tag in TAGS_INVISIVEIS or el.get("hidden") is not None or bool(_escondido_re.search(el.get("style", "")))
+
+
+def _escondido_ate(el, limite=None):
+    """el ou algum ancestral (até `limite`, exclusive) está escondido."""
+    if _escondido(el):
+        return True
+    for ancestral in el.iterancestors():
+        if ancestral is limite:
+            return False
+        if _escondido(ancestral):
+            return True
+    return False
+
+
+def _coletar_texto(el, partes):
+    if _escondido(el):
+        return
+    if el.tag == "br":
+        partes.append("\n")
+    elif el.tag in TAGS_BLOCO:
+        partes.append("\n")
+    if el.text:
+        partes.append(el.text)
+    for filho in el:
+        if isinstance(filho.tag, str):  # comentários/instruções não têm texto visível
+            _coletar_texto(filho, partes)
+        if filho.tail:
+            partes.append(filho.tail)
+    if el.tag in TAGS_BLOCO:
+        partes.append("\n")
+
+
+def texto_visivel(el):
+    """Texto do elemento como o WebElement.text do Selenium devolveria."""
+    partes = []
+    _coletar_texto(el, partes)
+    texto = "".join(partes).replace("\u00a0", " ")
+    linhas = (_espacos_re.sub(" ", linha).strip() for linha in texto.split("\n"))
+    return "\n".join(linha for linha in linhas if linha)
+
+
+def extrair_tabelas(html):
+    """Todas as tabelas folha com dados, em ordem: lista de tabelas, cada uma lista de linhas."""
+    try:
+        doc = lxml.html.fromstring(html)
+    except lxml.etree.ParserError:
+        return []  # HTML vazio/só espaços: sem tabela, como no caminho Selenium
+    tabelas = []
+    for tabela in doc.iter("table"):
+        if tabela.find(".//table") is not None or _escondido_ate(tabela):
+            continue  # tabela de layout (ou escondida, ela ou um ancestral): os dados estão nas internas
+        dados = []
+        for tr in tabela.iter("tr"):
+            if _escondido_ate(tr, tabela):
+                continue  # linha escondida (ela ou tbody/thead): o Selenium lê texto vazio
+            celulas = (texto_visivel(c) for c in tr.xpath(".//th|.//td"))
+            linha = [t for t in celulas if t != ""]
+            if linha:
+                dados.append(linha)
+        if dados:
+            tabelas.append(dados)
+    return tabelas
+
+
+def primeira_tabela(html, colunas=None):
+    """
+    Primeira tabela com dados. colunas: se informado, prefere a primeira
+    cujo cabeçalho tenha alguma delas (cai na primeira com dados se nenhuma tiver).
+    """
+    tabelas = extrair_tabelas(html)
+    if colunas:
+        for dados in tabelas:
+            if any(c in dados[0] for c in colunas):
+                return dados
+    return tabelas[0] if tabelas else []
+
+
+if __name__ == "__main__":
+    pasta = Path(__file__).parent / "fixtures"
+    arquivos = [Path(a) for a in sys.argv[1:]] or [pasta / "salesforce_email.html"]
+    for arquivo in arquivos:
+        html = arquivo.read_text(encoding="utf-8")
+        repeticoes = 200
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            dados = primeira_tabela(html)
+        ms = (time.perf_counter() - inicio) * 1000 / repeticoes
+        esperado = arquivo.with_suffix(".json")
+        if esperado.exists():
+            ok = json.loads(esperado.read_text(encoding="utf-8")) == dados
+            print(f"{'✅' if ok else '❌'} {arquivo.name}: {len(dados)} linhas em {ms:.2f} ms (esperado: {esperado.name})")
+        else:
+            print(f"✅ {arquivo.name}: {len(dados)} linhas em {ms:.2f} ms")
+            print(json.dumps(dados, indent=2, ensure_ascii=False))
+    vazio = primeira_tabela(" \n ")
+    print(f"{'✅' if vazio == [] else '❌'} HTML vazio: {vazio}")
@@ -0,0 +1,82 @@
+# test_diario_preenchimento.py
+"""
+Escopo por plano e compactação do diário de preenchimento.
+
+    python -m pytest test_diario_preenchimento.py     (ou python -m unittest test_diario_preenchimento)
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from diario_preenchimento import CONFIRMADO, ENVIADO, PENDENTE, DiarioPreenchimento, escopo_do_plano
+
+
+class TestDiarioPreenchimento(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.tmp.name, "diario.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _linhas(self):
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            return [json.loads(linha) for linha in f]
+
+    def test_escopo_muda_com_o_conteudo_do_plano(self):
+        plano = os.path.join(self.tmp.name, "plano.json")
+        with open(plano, "w", encoding="utf-8") as f:
+            json.dump({"01/03/2024": ["07:30"]}, f)
+        antes = escopo_do_plano(plano)
+        with open(plano, "w", encoding="utf-8") as f:
+            json.dump({"01/03/2024": ["07:45"]}, f)
+        self.assertNotEqual(antes, escopo_do_plano(plano))
+
+    def test_plano_novo_ignora_confirmados_de_outro_plano(self):
+        with DiarioPreenchimento(self.caminho, escopo="a") as diario:
+            diario.registrar("01/03/2024", "07:30", PENDENTE)
+            diario.registrar("01/03/2024", "07:30", CONFIRMADO)
+
+        with DiarioPreenchimento(self.caminho, escopo="b") as diario:
+            novos, incertos, confirmados = diario.separar([("01/03/2024", "07:30")])
+            self.assertEqual((novos, incertos, confirmados), ([("01/03/2024", "07:30")], [], 0))
+        self.assertEqual(self._linhas(), [])  # eventos do plano anterior descartados
+
+    def test_mesmo_plano_retoma(self):
+        with DiarioPreenchimento(self.caminho, escopo="a") as diario:
+            diario.registrar("01/03/2024", "07:30", CONFIRMADO)
+            diario.registrar("01/03/2024", "11:30", ENVIADO)
+
+        with DiarioPreenchimento(self.caminho, escopo="a") as diario:
+            novos, incertos, confirmados = diario.separar([("01/03/2024", "07:30"), ("01/03/2024", "11:30")])
+        self.assertEqual((novos, incertos, confirmados), ([], [("01/03/2024", "11:30")], 1))
+
+    def test_compactar_deixa_uma_linha_por_horario(self):
+        itens = [("01/03/2024", "07:30"), ("01/03/2024", "11:30")]
+        with DiarioPreenchimento(self.caminho, escopo="a") as diario:
+            for data_str, horario in itens:
+                diario.registrar(data_str, horario, PENDENTE)
+                diario.registrar(data_str, horario, ENVIADO)
+                diario.registrar(data_str, horario, CONFIRMADO)
+            self.assertTrue(diario.completo(itens))
+            diario.compactar()
+            diario.registrar("02/03/2024", "07:30", PENDENTE)  # segue anexando depois de compactar
+
+        linhas = self._linhas()
+        self.assertEqual([(e["data"], e["horario"], e["estado"]) for e in linhas],
+                         [("01/03/2024", "07:30", CONFIRMADO), ("01/03/2024", "11:30", CONFIRMADO),
+                          ("02/03/2024", "07:30", PENDENTE)])
+        self.assertTrue(all(e["plano"] == "a" for e in linhas))
+
+    def test_completo_exige_todos_confirmados(self):
+        with DiarioPreenchimento(self.caminho, escopo="a") as diario:
+            diario.registrar("01/03/2024", "07:30", CONFIRMADO)
+            diario.registrar("01/03/2024", "11:30", ENVIADO)
+            self.assertFalse(diario.completo([("01/03/2024", "07:30"), ("01/03/2024", "11:30")]))
+            self.assertTrue(diario.completo([("01/03/2024", "07:30")]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+# test_envio_http.py
+"""
+Backend HTTP do preenchimento contra o servidor_pmovel_simulado.
+
+    python -m pytest test_envio_http.py     (ou python -m unittest test_envio_http)
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import envio_http
+from diario_preenchimento import CONFIRMADO, DiarioPreenchimento
+from diario_preenchimento import INCERTO as INCERTO_DIARIO
+from envio_http import ACEITO, INCERTO, RECUSADO, criar_sessao, enviar_lote, enviar_pendentes_http, lotes_de_dias
+from preencher_registros import conferir_incertos
+from servidor_pmovel_simulado import COOKIE_SESSAO, CSRF_TOKEN, iniciar_servidor_simulado
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _dia(data_str, horarios=("07:30", "11:30", "12:30", "16:54")):
+    return [(data_str, h) for h in horarios]
+
+
+class TestEnvioHttp(unittest.TestCase):
+    def setUp(self):
+        self.servidor, self.url = iniciar_servidor_simulado()
+        self.sessao = criar_sessao(
+            [{"name": COOKIE_SESSAO, "value": "abc", "domain": "127.0.0.1", "path": "/"}],
+            csrf_token=CSRF_TOKEN,
+        )
+
+    def tearDown(self):
+        self.sessao.close()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def test_horarios_do_dia_chegam_em_ordem(self):
+        self.servidor.atraso_resposta = 0.005  # respostas lentas: dias diferentes se intercalam
+        itens = [item for d in range(1, 9) for item in _dia(f"{d:02d}/10/2026")]
+
+        resultados = enviar_lote(self.sessao, itens, url=self.url)
+
+        self.assertEqual([item for item, _, _ in resultados], itens)
+        self.assertTrue(all(r == ACEITO for _, r, _ in resultados))
+        for d in range(1, 9):
+            data_str = f"{d:02d}/10/2026"
+            self.assertEqual(self.servidor.registros[data_str], [h for _, h in _dia(data_str)])
+
+    def test_recusa_interrompe_o_resto_do_dia(self):
+        itens = _dia("01/10/2026", ("07:30", "25:00", "12:30")) + _dia("02/10/2026", ("07:30", "16:54"))
+
+        recusados, incertos = enviar_pendentes_http(None, itens, url=self.url, sessao=self.sessao)
+
+        self.assertEqual(recusados, [("01/10/2026", "25:00"), ("01/10/2026", "12:30")])
+        self.assertEqual(incertos, [])
+        self.assertEqual(self.servidor.registros["01/10/2026"], ["07:30"])
+        self.assertEqual(self.servidor.registros["02/10/2026"], ["07:30", "16:54"])
+
+    def test_timeout_depois_de_gravar_fica_incerto(self):
+        self.servidor.atraso_resposta = 0.5
+        with mock.patch.object(envio_http, "TIMEOUT", 0.1):
+            recusados, incertos = enviar_pendentes_http(None, [("01/10/2026", "07:30")],
+                                                        url=self.url, sessao=self.sessao)
+
+        self.assertEqual(recusados, [])
+        self.assertEqual(incertos, [("01/10/2026", "07:30")])
+        self.assertEqual(self.servidor.registros["01/10/2026"], ["07:30"])  # gravou: relançar duplicaria
+
+    def test_sem_servidor_fica_incerto(self):
+        url = self.url
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        resultado, _ = envio_http.enviar_registro(self.sessao, "01/10/2026", "07:30", url=url)
+        self.assertEqual(resultado, INCERTO)
+        self.servidor, self.url = iniciar_servidor_simulado()  # para o tearDown
+
+    def test_sessao_expirada_e_recusada(self):
+        sessao = criar_sessao([], csrf_token=CSRF_TOKEN)
+        with sessao:
+            resultado, motivo = envio_http.enviar_registro(sessao, "01/10/2026", "07:30", url=self.url)
+        self.assertEqual((resultado, motivo), (RECUSADO, "HTTP 401"))
+        self.assertEqual(self.servidor.registros, {})
+
+    def test_lotes_nao_partem_dias(self):
+        itens = _dia("01/10/2026") + _dia("02/10/2026") + _dia("03/10/2026")
+        lotes = lotes_de_dias(itens, tamanho=6)
+        self.assertEqual(lotes, [_dia("01/10/2026"), _dia("02/10/2026"), _dia("03/10/2026")])
+        self.assertEqual(lotes_de_dias(itens, tamanho=8), [_dia("01/10/2026") + _dia("02/10/2026"),
+                                                           _dia("03/10/2026")])
+
+
+
+class _Pagina:
+    """Só o que conferir_incertos usa do navegador."""
+
+    def __init__(self, page_source):
+        self.page_source = page_source
+
+
+class TestConferirIncertos(unittest.TestCase):
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.caminho = os.path.join(pasta.name, "diario.jsonl")
+        self.html = (FIXTURES / "registros_mes.html").read_text(encoding="utf-8")
+
+    def test_so_relanca_o_que_a_linha_mostra_que_falta(self):
+        incertos = [("01/10/2026", "07:30"), ("01/10/2026", "08:00"), ("15/11/2026", "07:30")]
+        with DiarioPreenchimento(self.caminho) as diario:
+            relancar = conferir_incertos(_Pagina(self.html), diario, incertos)
+            self.assertEqual(relancar, [("01/10/2026", "08:00")])
+            self.assertEqual(diario.estados[("01/10/2026", "07:30")], CONFIRMADO)
+            self.assertEqual(diario.estados[("15/11/2026", "07:30")], INCERTO_DIARIO)  # mês fora do filtro
+
+    def test_tabela_ausente_nao_relanca_nada(self):
+        incertos = [("01/10/2026", "07:30"), ("02/10/2026", "08:00")]
+        with DiarioPreenchimento(self.caminho) as diario:
+            relancar = conferir_incertos(_Pagina("<html><body>Carregando...</body></html>"), diario, incertos)
+            self.assertEqual(relancar, [])
+            self.assertEqual({diario.estados[i] for i in incertos}, {INCERTO_DIARIO})
+        with DiarioPreenchimento(self.caminho) as diario:
+            self.assertEqual(diario.separar(incertos), ([], incertos, 0))  # reverificados na próxima
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# test_fonte_email.py
+"""
+Índice da FonteLocal: mbox que cresce, Maildir que move new/ -> cur/ e o
+"último email com esse assunto".
+
+    python -m pytest test_fonte_email.py     (ou python -m unittest test_fonte_email)
+"""
+
+import mailbox
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+from fonte_email import BYTES_ASSINATURA, FonteLocal
+
+ASSUNTO = "Relatar resultados (Tabela de Horas Trabalhadas)"
+BASE = datetime(2024, 3, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def _email(i, assunto=ASSUNTO):
+    m = EmailMessage()
+    m["Subject"] = assunto
+    m["Message-ID"] = f"<{i}@teste>"
+    m["Date"] = format_datetime(BASE + timedelta(hours=i))
+    m.set_content("texto")
+    m.add_alternative(f"<table class='t'><tr><td>{i}</td></tr></table>", subtype="html")
+    return m
+
+
+class TestFonteLocal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.indice = os.path.join(self.tmp.name, "indice.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fonte(self, origem):
+        fonte = FonteLocal(origem, self.indice)
+        self.addCleanup(fonte.fechar)
+        return fonte
+
+    def _contar(self, fonte):
+        return fonte.conexao().execute("SELECT count(*) FROM mensagens WHERE origem = ?",
+                                       (fonte.origem,)).fetchone()[0]
+
+    def test_mbox_pequeno_que_cresce_so_indexa_o_novo(self):
+        caminho = os.path.join(self.tmp.name, "caixa.mbox")
+        caixa = mailbox.mbox(caminho)
+        caixa.add(_email(1))
+        caixa.add(_email(2, "Reunião"))
+        caixa.flush()
+        self.assertLess(os.path.getsize(caminho), BYTES_ASSINATURA)
+
+        fonte = self._fonte(caminho)
+        self.assertEqual(fonte.atualizar(), 2)
+        caixa.add(_email(3))
+        caixa.flush()
+        self.assertEqual(fonte.atualizar(), 1)  # só a mensagem nova, não o arquivo todo
+        self.assertEqual(self._contar(fonte), 3)
+        self.assertEqual(fonte.atualizar(), 0)
+        caixa.close()
+
+    def test_maildir_new_para_cur(self):
+        origem = os.path.join(self.tmp.name, "md")
+        caixa = mailbox.Maildir(origem)
+        chave = caixa.add(_email(1))
+        caixa.add(_email(2))
+
+        fonte = self._fonte(origem)
+        self.assertEqual(fonte.atualizar(), 2)
+        mensagem = caixa[chave]
+        mensagem.set_subdir("cur")
+        caixa[chave] = mensagem
+
+        self.assertEqual(fonte.atualizar(), 1)  # reindexa só o arquivo movido
+        self.assertEqual(self._contar(fonte), 2)
+        caminhos = {item["caminho"] for item in fonte.buscar()}
+        self.assertTrue(any(os.sep + "cur" + os.sep in c for c in caminhos))
+        self.assertTrue(all(os.path.exists(c) for c in caminhos))
+
+    def test_ultimo_email_com_o_assunto(self):
+        origem = os.path.join(self.tmp.name, "md")
+        caixa = mailbox.Maildir(origem)
+        caixa.add(_email(5))
+        caixa.add(_email(9))  # o mais recente com o assunto
+        caixa.add(_email(12, "Reunião"))  # mais recente, mas outro assunto
+        caixa.add(_email(1))
+
+        fonte = self._fonte(origem)
+        self.assertIn("<td>9</td>", fonte.ultimo_html("relatar RESULTADOS"))
+        self.assertEqual(fonte.buscar(ASSUNTO, limite=1)[0]["message_id"], "<9@teste>")
+        self.assertIsNone(fonte.ultimo_html("nada com isso"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# test_parser_registros.py
+"""
+Parse offline da página de Registros contra o resultado esperado da fixture.
+
+    python -m pytest test_parser_registros.py     (ou python -m unittest test_parser_registros)
+"""
+
+import json
+import unittest
+from pathlib import Path
+
+from parser_registros import linhas_html_com_fingerprint, montar_registros_incremental, parse_registros_html
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class TestParserRegistros(unittest.TestCase):
+    def setUp(self):
+        self.html = (FIXTURES / "registros_mes.html").read_text(encoding="utf-8")
+        self.esperado = json.loads((FIXTURES / "registros_mes.json").read_text(encoding="utf-8"))
+
+    def test_fixture_bate_com_json(self):
+        self.assertEqual(parse_registros_html(self.html), self.esperado)
+
+    def test_incremental_so_le_linhas_alteradas(self):
+        registros, fingerprints, _ = montar_registros_incremental(
+            linhas_html_com_fingerprint(self.html), {}, {})
+        self.assertEqual(registros, self.esperado)
+
+        html_novo = self.html.replace("18:40", "18:45", 1)
+        lidas = []
+
+        def contando(linhas):
+            for data_texto, fp, extrair in linhas:
+                if extrair is None:
+                    yield data_texto, fp, extrair
+                else:
+                    yield data_texto, fp, lambda d=data_texto, e=extrair: lidas.append(d) or e()
+
+        novos, _, alteracoes = montar_registros_incremental(
+            contando(linhas_html_com_fingerprint(html_novo)), registros, fingerprints)
+        self.assertEqual(lidas, ["08/10/2026"])
+        self.assertEqual(alteracoes, {"adicionados": [], "alterados": ["08/10/2026"], "removidos": []})
+        self.assertEqual(novos["08/10/2026"]["out_2"], "18:45")
+        self.assertEqual(novos, parse_registros_html(html_novo))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# test_preencher_registros.py
+"""
+IndiceLinhas (data -> botão "+") com um navegador falso.
+
+    python -m pytest test_preencher_registros.py     (ou python -m unittest test_preencher_registros)
+"""
+
+import unittest
+from unittest import mock
+
+import preencher_registros
+from preencher_registros import JS_INDICE_LINHAS, IndiceLinhas
+from selenium.common.exceptions import TimeoutException
+
+
+class _Navegador:
+    """Devolve um índice de cada vez a cada montagem; a tabela nunca muda depois."""
+
+    def __init__(self, *indices):
+        self.indices = list(indices)
+
+    def execute_script(self, script, *args):
+        if script == JS_INDICE_LINHAS:
+            return self.indices.pop(0) if len(self.indices) > 1 else self.indices[0]
+        return False  # JS_ROLAR_E_VERIFICAR: tabela não mudou
+
+
+class TestIndiceLinhas(unittest.TestCase):
+    def setUp(self):
+        espera = mock.patch.object(preencher_registros, "aguardar_estavel")
+        self.aguardar_estavel = espera.start()
+        self.addCleanup(espera.stop)
+
+    def test_data_faltando_remonta_depois_da_tabela_assentar(self):
+        indice = IndiceLinhas(_Navegador({"01/10/2026": "b1"}, {"01/10/2026": "b1", "02/10/2026": "b2"}))
+        self.assertEqual(indice.botao("01/10/2026"), "b1")
+        self.assertEqual(indice.botao("02/10/2026"), "b2")  # montado com a tabela pela metade
+        self.assertEqual(indice.reconstrucoes, 2)
+        self.aguardar_estavel.assert_called_once()
+
+    def test_data_ausente_remonta_so_uma_vez(self):
+        indice = IndiceLinhas(_Navegador({"01/10/2026": "b1"}))
+        for _ in range(3):
+            with self.assertRaises(TimeoutException):
+                indice.botao("15/11/2026")
+        self.assertEqual(indice.reconstrucoes, 2)
+        self.assertEqual(indice.botao("01/10/2026"), "b1")
+
+
+if __name__ == "__main__":
+    unittest.main()
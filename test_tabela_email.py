@@ -0,0 +1,58 @@
+# test_tabela_email.py
+"""
+Extração da tabela do email do Salesforce (tabela_email) contra os fixtures.
+
+    python -m pytest test_tabela_email.py     (ou python -m unittest test_tabela_email)
+"""
+
+import json
+import unittest
+from pathlib import Path
+
+from tabela_email import extrair_tabelas, primeira_tabela
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+PLANA = """
+<html><body>
+  <p>Relatório</p>
+  <table>
+    <tr><th>Data</th><th>Tipo</th><th></th></tr>
+    <tr><td>01/10/2026</td><td> Labour &amp;  extra </td><td>&nbsp;</td></tr>
+    <tr><td></td><td></td></tr>
+  </table>
+  <table><tr><th>Duration</th></tr><tr><td>4,00</td></tr></table>
+</body></html>
+"""
+
+
+class TestTabelaEmail(unittest.TestCase):
+    def test_fixture_bate_com_json(self):
+        html = (FIXTURES / "salesforce_email.html").read_text(encoding="utf-8")
+        esperado = json.loads((FIXTURES / "salesforce_email.json").read_text(encoding="utf-8"))
+        self.assertEqual(primeira_tabela(html), esperado)
+
+    def test_html_vazio(self):
+        self.assertEqual(primeira_tabela(""), [])
+        self.assertEqual(primeira_tabela(" \n "), [])
+        self.assertEqual(extrair_tabelas("<html><body><p>sem tabela</p></body></html>"), [])
+
+    def test_tabela_e_linha_escondidas(self):
+        html = (FIXTURES / "salesforce_email.html").read_text(encoding="utf-8")
+        texto = json.dumps(extrair_tabelas(html), ensure_ascii=False)
+        self.assertNotIn("Pré-visualização", texto)  # tabela dentro de <div style="display:none">
+        self.assertNotIn("TE-000199", texto)  # <tr style="display: none">
+        self.assertNotIn("00O5e000", texto)  # <span> escondido no rodapé
+
+    def test_escolha_por_colunas(self):
+        self.assertEqual(primeira_tabela(PLANA, colunas=["Duration"]), [["Duration"], ["4,00"]])
+        self.assertEqual(primeira_tabela(PLANA, colunas=["Inexistente"]), primeira_tabela(PLANA))
+
+    def test_tabela_plana_segue_regra_antiga(self):
+        # sem aninhamento: a primeira tabela com dados, células vazias descartadas
+        self.assertEqual(primeira_tabela(PLANA), [["Data", "Tipo"], ["01/10/2026", "Labour & extra"]])
+        self.assertEqual(len(extrair_tabelas(PLANA)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# triagem_pdf.py
+"""
+Triagem barata das páginas do report.pdf antes do camelot.
+
+A detecção de tabelas do camelot é a parte cara da extração, e boa parte do
+report é capa, resumo ou continuação vazia. Aqui cada página é avaliada só
+com o pypdf (texto extraído + operadores do content stream):
+
+- pontos: linhas de texto com cara de linha de tabela: 2+ datas/horas na
+  linha (início e término de um apontamento), ou 3+ campos separados por
+  espaço largo/tab/" | " com algum número, desde que outra linha da página
+  tenha o mesmo número de campos (colunas alinhadas). Prosa com números não
+  conta. Abaixo de LIMIAR_PONTOS a página é pulada.
+- réguas: traços e retângulos desenhados (operadores "re" e "l"). Com pelo
+  menos MIN_REGUAS a página vai para o flavor "lattice"; senão "stream".
+
+As decisões ficam em ARQ_TRIAGEM para ajustar os limiares. A triagem é
+opcional (triagem=False por padrão no emailtoexcel e no pipeline) até os
+limiares serem conferidos em reports reais.
+"""
+
+import json
+import re
+from collections import Counter
+
+from pypdf.generic import ContentStream
+
+LIMIAR_PONTOS = 3
+MIN_REGUAS = 4
+ARQ_TRIAGEM = "triagem_paginas.json"
+
+PULAR = "pular"
+LATTICE = "lattice"
+STREAM = "stream"
+
+_campos_re = re.compile(r"\s{2,}|\t|\s\|\s")
+_numero_re = re.compile(r"\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}:\d{2}|\d+[.,]?\d*")
+_data_hora_re = re.compile(r"\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}:\d{2}")
+
+
+def contar_reguas(pagina, reader):
+    """Quantos retângulos/segmentos de reta o content stream desenha."""
+    conteudo = pagina.get_contents()
+    if conteudo is None:
+        return 0
+    try:
+        operacoes = ContentStream(conteudo, reader).operations
+    except Exception:
+        return 0  # stream que o pypdf não entende: conta como sem réguas
+    return sum(1 for _, operador in operacoes if operador in (b"re", b"l"))
+
+
+def pontuar_texto(texto):
+    """
+    Linhas com 2+ datas/horas, mais as linhas com 3+ campos (separados por
+    espaços largos, tab ou " | ") e algum número cujo número de campos se
+    repete em outra linha.
+    """
+    pontos = 0
+    por_campos = Counter()
+    for linha in texto.splitlines():
+        linha = linha.strip()
+        if not linha:
+            continue
+        if len(_data_hora_re.findall(linha)) >= 2:
+            pontos += 1
+            continue
+        if not _numero_re.search(linha):
+            continue
+        campos = [c for c in _campos_re.split(linha) if c]
+        if len(campos) >= 3:
+            por_campos[len(campos)] += 1
+    return pontos + sum(n for n in por_campos.values() if n >= 2)
+
+
+def avaliar_pagina(pagina, reader, numero, limiar=LIMIAR_PONTOS, min_reguas=MIN_REGUAS):
+    """Decisão de uma página: {"pagina", "pontos", "reguas", "decisao"}."""
+    try:
+        texto = pagina.extract_text() or ""
+    except Exception:
+        texto = ""
+    pontos = pontuar_texto(texto)
+    reguas = contar_reguas(pagina, reader)
+    if pontos < limiar and reguas < min_reguas:
+        decisao = PULAR
+    else:
+        decisao = LATTICE if reguas >= min_reguas else STREAM
+    return {"pagina": numero, "pontos": pontos, "reguas": reguas, "decisao": decisao}
+
+
+def triar_paginas(reader, limiar=LIMIAR_PONTOS, min_reguas=MIN_REGUAS):
+    """Avalia todas as páginas de um PdfReader; lista na ordem das páginas."""
+    return [avaliar_pagina(p, reader, i, limiar, min_reguas) for i, p in enumerate(reader.pages, start=1)]
+
+
+def relatar(decisoes, caminho=ARQ_TRIAGEM):
+    """Resumo no terminal + decisões por página em JSON."""
+    contagem = {PULAR: 0, LATTICE: 0, STREAM: 0}
+    for d in decisoes:
+        contagem[d["decisao"]] += 1
+    print(f"🔎 Triagem: {contagem[LATTICE]} lattice, {contagem[STREAM]} stream, {contagem[PULAR]} puladas")
+    puladas = [d["pagina"] for d in decisoes if d["decisao"] == PULAR]
+    if puladas:
+        print(f"   puladas: {puladas}")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(decisoes, f, indent=2, ensure_ascii=False)